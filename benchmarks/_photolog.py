@@ -0,0 +1,27 @@
+"""
+Loads src/photologgen5.0.py as the `photologgen` module (its file name isn't importable).
+
+The module is registered as soon as this file is imported, not just when
+load_photologgen() is called: pool workers started with the spawn method
+(the default on Windows and macOS) re-import the benchmark script, and so
+this file, before they unpickle photologgen.compress_image or
+photologgen.render_photolog_part.
+"""
+import importlib.util
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src", "photologgen5.0.py")
+
+
+def load_photologgen():
+    if "photologgen" in sys.modules:
+        return sys.modules["photologgen"]
+    spec = importlib.util.spec_from_file_location("photologgen", SRC)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["photologgen"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+load_photologgen()
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark: read_exif_fast vs exifread on a folder of camera files.
+
+    python benchmarks/bench_exif.py /path/to/photos [--repeat 5]
+
+Reports per-file time for both readers and lists any file where the two
+disagree on the fields get_photo_metadata uses.
+"""
+import argparse
+import os
+import time
+
+from _photolog import load_photologgen
+
+
+def time_reader(reader, paths, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            try:
+                reader(path)
+            except Exception:
+                pass
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="folder of JPEG/TIFF/HEIC camera files")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per reader; the best is reported")
+    args = parser.parse_args()
+
+    pl = load_photologgen()
+    paths = sorted(
+        os.path.join(args.folder, name)
+        for name in os.listdir(args.folder)
+        if name.lower().endswith(pl.EXIF_EXTENSIONS)
+    )
+    if not paths:
+        parser.error("no JPEG/TIFF/HEIC files in folder")
+
+    fallbacks = 0
+    mismatches = []
+    for path in paths:
+        try:
+            fast = pl.read_exif_fast(path)
+        except pl.ExifFormatError:
+            fallbacks += 1
+            continue
+        try:
+            slow = pl.read_exif_exifread(path)
+        except Exception:
+            continue  # exifread can't read it (e.g. HEIC on older exifread); nothing to compare
+        if fast != slow:
+            mismatches.append((path, fast, slow))
+
+    fast_s = time_reader(pl.read_exif_fast, paths, args.repeat)
+    slow_s = time_reader(pl.read_exif_exifread, paths, args.repeat)
+
+    print(f"files:        {len(paths)}")
+    print(f"fast reader:  {fast_s / len(paths) * 1000:.3f} ms/file")
+    print(f"exifread:     {slow_s / len(paths) * 1000:.3f} ms/file")
+    print(f"speedup:      {slow_s / fast_s:.1f}x")
+    print(f"fallbacks:    {fallbacks}")
+    print(f"mismatches:   {len(mismatches)}")
+    for path, fast, slow in mismatches:
+        print(f"  {path}\n    fast:     {fast}\n    exifread: {slow}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Note field strategies: how big each photolog is and how long it takes to parse.
+
+    python benchmarks/bench_fields.py small [--sizes 12] [--repeat 5] [--out fields.json]
+
+Builds the same photolog once per FIELD_STRATEGIES entry (photos prepared once
+through a scratch DerivativeCache, so only the form differs) and reports:
+
+- size:   the PDF's bytes, and the bytes per photo over the "print" log (no fields)
+- fields: form fields and widget annotations in the file, and how many
+          distinct appearance streams the widgets use ("shared" and "single"
+          must use exactly one; the exit code is 1 otherwise)
+- parse:  pypdf opening the file, resolving every page's widgets and their
+          appearance streams, and reading the field tree (best of --repeat),
+          which is roughly the work a viewer does before a form page is usable
+
+Needs pypdf.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+
+from _photolog import load_photologgen
+from corpus import CORPORA, DEFAULT_ROOT, ensure_corpus, parse_sizes
+
+
+def parse_form(path):
+    """Opens the PDF and walks its widgets and field tree; returns (fields, widgets)."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    widgets = 0
+    for page in reader.pages:
+        for annot in page.get("/Annots") or ():
+            annot = annot.get_object()
+            if annot.get("/Subtype") == "/Widget":
+                widgets += 1
+                annot["/AP"]["/N"].get_object().get_data()
+    return len(reader.get_fields() or {}), widgets
+
+
+def appearance_streams(path):
+    """How many distinct /AP /N streams the file's widgets point at."""
+    from pypdf import PdfReader
+
+    streams = set()
+    for page in PdfReader(path).pages:
+        for annot in page.get("/Annots") or ():
+            annot = annot.get_object()
+            if annot.get("/Subtype") == "/Widget":
+                streams.add(annot["/AP"].raw_get("/N").idnum)
+    return len(streams)
+
+
+def time_parse(path, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts = parse_form(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", choices=sorted(CORPORA, key=CORPORA.get))
+    parser.add_argument("--sizes", type=parse_sizes, default=(12,), help="megapixel sizes, e.g. 12,48")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="where corpora are kept")
+    parser.add_argument("--profile", default="draft",
+                        help="output profile for the photos (small keeps the form visible)")
+    parser.add_argument("--repeat", type=int, default=5, help="parses per strategy; the best time is kept")
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    if importlib.util.find_spec("pypdf") is None:
+        parser.error("needs pypdf: pip install pypdf")
+
+    pl = load_photologgen()
+    if args.profile not in pl.OUTPUT_PROFILES:
+        parser.error(f"--profile must be one of {', '.join(pl.OUTPUT_PROFILES)}")
+    folder, logo_path, manifest = ensure_corpus(args.corpus, args.sizes, args.seed, args.root)
+    paths = sorted((entry.path for entry in pl.list_photos(folder)), key=lambda p: os.path.basename(p).lower())
+    photos = [(path, *pl.get_photo_metadata(path)) for path in paths]
+
+    results = {"corpus": {key: manifest[key] for key in ("name", "count", "sizes_mp", "seed", "version")},
+               "profile": args.profile, "strategies": {}}
+    with tempfile.TemporaryDirectory(prefix="photolog_fields_") as scratch:
+        cache = pl.DerivativeCache(os.path.join(scratch, "cache"))
+        for fields in pl.FIELD_STRATEGIES:
+            path, = pl.create_photolog(photos, os.path.join(scratch, fields), logo_path,
+                                       cache=cache, profile=args.profile, fields=fields)
+            parse_s, (field_count, widgets) = time_parse(path, max(1, args.repeat))
+            results["strategies"][fields] = {
+                "bytes": os.path.getsize(path),
+                "fields": field_count,
+                "widgets": widgets,
+                "appearance_streams": appearance_streams(path),
+                "parse_s": round(parse_s, 4),
+            }
+
+    plain = results["strategies"]["print"]["bytes"]
+    print(f"{len(photos)} photos, profile {args.profile}")
+    print(f"{'fields':<10}{'size':>14}{'form/photo':>12}{'widgets':>9}{'APs':>6}{'parse':>11}")
+    for fields, r in results["strategies"].items():
+        r["form_bytes_per_photo"] = round((r["bytes"] - plain) / len(photos))
+        print(f"{fields:<10}{r['bytes'] / 2**20:>10.2f} MiB{r['form_bytes_per_photo']:>10,} B"
+              f"{r['widgets']:>9}{r['appearance_streams']:>6}{r['parse_s'] * 1000:>8.0f} ms")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    unshared = [fields for fields in ("shared", "single") if results["strategies"][fields]["appearance_streams"] != 1]
+    if unshared:
+        print(f"not sharing one appearance stream: {', '.join(unshared)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
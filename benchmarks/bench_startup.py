@@ -0,0 +1,98 @@
+"""
+Startup benchmark: how long until the main window is on screen.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--target 0.5]
+
+Each run starts a fresh interpreter that imports the app, builds PhotologApp
+and processes the first round of Tk events. Reports the time to import and
+the time until the window was drawn (both from process launch), plus any of
+the heavy optional modules that got imported before the window appeared.
+Exits 1 if the median window time misses --target seconds.
+
+Without a display only the import time is measured.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("reportlab", "requests", "exifread", "pillow_heif")
+
+CHILD = """
+import json, sys
+sys.path.insert(0, {bench_dir!r})
+from _photolog import load_photologgen
+pl = load_photologgen()
+print(json.dumps({{"event": "imported"}}), flush=True)
+pl.load_tk()
+try:
+    root = pl.tk.Tk()
+except pl.tk.TclError as e:
+    print(json.dumps({{"event": "no_display", "error": str(e)}}), flush=True)
+    sys.exit(0)
+app = pl.PhotologApp(root)
+root.update()
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"event": "shown", "heavy_modules": loaded}}), flush=True)
+root.destroy()
+"""
+
+
+def run_once():
+    """One cold start; returns {"import_s", "window_s" (None without a display), "heavy_modules"}."""
+    code = CHILD.format(bench_dir=BENCH_DIR, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True)
+    result = {"import_s": None, "window_s": None, "heavy_modules": None}
+    for line in proc.stdout:
+        elapsed = time.perf_counter() - start
+        event = json.loads(line)
+        if event["event"] == "imported":
+            result["import_s"] = elapsed
+        elif event["event"] == "shown":
+            result["window_s"] = elapsed
+            result["heavy_modules"] = event["heavy_modules"]
+        elif event["event"] == "no_display":
+            result["error"] = event["error"]
+    proc.wait()
+    if result["import_s"] is None:
+        raise RuntimeError(f"app failed to import (exit code {proc.returncode})")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="cold starts to run; the median is reported")
+    parser.add_argument("--target", type=float, default=0.5, help="seconds the window should appear within")
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(max(1, args.repeat))]
+    import_s = statistics.median(run["import_s"] for run in runs)
+    shown = [run["window_s"] for run in runs if run["window_s"] is not None]
+    window_s = statistics.median(shown) if shown else None
+
+    print(f"runs:         {len(runs)}")
+    print(f"import:       {import_s * 1000:.0f} ms (median, from launch)")
+    if window_s is None:
+        print(f"window:       not measured ({runs[0].get('error', 'no display')})")
+    else:
+        print(f"window:       {window_s * 1000:.0f} ms (median, from launch; target {args.target * 1000:.0f} ms)")
+        print(f"heavy before window: {', '.join(runs[0]['heavy_modules']) or 'none'}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"import_s": import_s, "window_s": window_s, "target_s": args.target, "runs": runs}, f, indent=2)
+
+    if window_s is not None and window_s > args.target:
+        print("window missed the target")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+End-to-end benchmark suite on a synthetic corpus (see corpus.py).
+
+    python benchmarks/bench_suite.py small --out results.json
+    python benchmarks/bench_suite.py small --baseline results.json --threshold 0.10
+
+Stages, each timed in a fresh process so peak memory belongs to that stage:
+
+- scan:       list the folder and read every photo's metadata (get_photo_metadata)
+- thumbnails: the preview grid's 220x160 thumbnails (load_thumbnail, no disk cache)
+- previews:   the grid's first, quick thumbnails (embedded EXIF/HEIC previews where there are any)
+- compress:   the PDF images (compress_image, no disk cache)
+- photolog:   create_photolog end to end, with --workers image preparation processes
+              (or, with --sharded, page ranges rendered in --workers processes and merged)
+
+Each stage reports seconds (best of --repeat), photos/s, peak RSS and bytes
+out (PDF images / PDF size). With --baseline, any stage whose time, peak
+memory or output size grew by more than --threshold is reported as a
+regression and the exit code is 1. Results are only compared when both runs
+used the same corpus.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import PIL
+import reportlab
+
+from _photolog import load_photologgen
+from corpus import CORPORA, DEFAULT_ROOT, ensure_corpus, parse_sizes
+
+STAGES = ("scan", "thumbnails", "previews", "compress", "photolog")
+RESULTS_VERSION = 1
+THUMB_SIZE = (220, 160)  # PhotoPreviewWindow.thumb_size
+METRICS = ("seconds", "peak_rss_bytes", "bytes_out")  # lower is better for all of them
+
+
+def photo_paths(pl, folder):
+    return sorted((entry.path for entry in pl.list_photos(folder)), key=lambda p: os.path.basename(p).lower())
+
+
+def stage_scan(pl, folder, logo_path, workers):
+    entries = pl.list_photos(folder)
+    for entry in entries:
+        pl.get_photo_metadata(entry.path)
+    return len(entries), 0
+
+
+def stage_thumbnails(pl, folder, logo_path, workers):
+    paths = photo_paths(pl, folder)
+    for path in paths:
+        pl.load_thumbnail(path, THUMB_SIZE)
+    return len(paths), 0
+
+
+def stage_previews(pl, folder, logo_path, workers):
+    paths = photo_paths(pl, folder)
+    for path in paths:
+        pl.load_thumbnail(path, THUMB_SIZE, quick=True)
+    return len(paths), 0
+
+
+def stage_compress(pl, folder, logo_path, workers):
+    paths = photo_paths(pl, folder)
+    return len(paths), sum(len(pl.compress_image(path)) for path in paths)
+
+
+def stage_photolog(pl, folder, logo_path, workers, photos, sharded=False):
+    with tempfile.TemporaryDirectory(prefix="photolog_bench_") as out:
+        written = pl.create_photolog(photos, out, logo_path, workers=workers, sharded=sharded)
+        return len(photos), sum(os.path.getsize(path) for path in written)
+
+
+def run_stage(stage, folder, logo_path, workers, repeat, sharded=False):
+    """Runs one stage `repeat` times in this (fresh) process; returns its result dict."""
+    pl = load_photologgen()
+    extra = {}
+    if stage == "photolog":
+        # Metadata comes from the scan stage's job; only PDF generation is timed here
+        extra["photos"] = [(path, *pl.get_photo_metadata(path)) for path in photo_paths(pl, folder)]
+        extra["sharded"] = sharded
+    func = globals()[f"stage_{stage}"]
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count, bytes_out = func(pl, folder, logo_path, workers, **extra)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "photos": count,
+        "seconds": round(best, 4),
+        "photos_per_s": round(count / best, 2) if best else None,
+        "peak_rss_bytes": pl.peak_rss_bytes(),
+        "bytes_out": bytes_out,
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pillow": PIL.__version__,
+        "reportlab": reportlab.Version,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Prints a stage-by-stage comparison; returns the list of regressions."""
+    if baseline.get("corpus") != results["corpus"]:
+        print("baseline used a different corpus; not comparing")
+        return []
+    regressions = []
+    print(f"\n{'stage':<12}{'metric':<16}{'baseline':>14}{'now':>14}{'change':>10}")
+    for stage, now in results["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            continue
+        for metric in METRICS:
+            old, new = before.get(metric), now.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions.append((stage, metric, change))
+            print(f"{stage:<12}{metric:<16}{old:>14,}{new:>14,}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", choices=sorted(CORPORA, key=CORPORA.get))
+    parser.add_argument("--sizes", type=parse_sizes, default=(12, 24, 48), help="megapixel sizes, e.g. 12,48")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="where corpora are kept")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of " + ", ".join(STAGES))
+    parser.add_argument("--workers", type=int, default=1, help="image preparation processes for the photolog stage")
+    parser.add_argument("--sharded", action="store_true", help="render the photolog stage in page-range shards")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per stage; the best time is kept")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed growth before a regression (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    print(f"corpus {args.corpus} ({', '.join(map(str, sorted(args.sizes)))} MP, seed {args.seed})")
+    folder, logo_path, manifest = ensure_corpus(args.corpus, args.sizes, args.seed, args.root)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "corpus": {key: manifest[key] for key in ("name", "count", "sizes_mp", "seed", "version")},
+        "environment": environment(),
+        "workers": args.workers,
+        "sharded": args.sharded,
+        "stages": {},
+    }
+    for stage in stages:
+        # A fresh process per stage: peak RSS never carries over from the previous stage
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(run_stage, stage, folder, logo_path, args.workers, args.repeat, args.sharded).result()
+        results["stages"][stage] = result
+        rss = result["peak_rss_bytes"]
+        print(f"{stage:<12}{result['seconds']:>9.2f} s {result['photos_per_s']:>9.1f} photos/s"
+              f"   peak {rss / 2**20 if rss else 0:>7.0f} MiB   out {result['bytes_out'] / 2**20:>8.1f} MiB")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
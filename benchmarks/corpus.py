@@ -0,0 +1,206 @@
+"""
+Deterministic synthetic photo corpora for the benchmarks.
+
+    python benchmarks/corpus.py small [--sizes 12,24,48] [--root benchmarks/.corpora]
+
+A corpus is a folder of generated camera-like files plus a logo:
+
+- JPEGs with EXIF timestamps and GPS, with EXIF but no GPS, and with no EXIF;
+  the ones with EXIF carry a 160x120 thumbnail like camera files do
+- PNGs (always at the smallest size; nobody shoots 48 MP PNGs)
+- landscape and portrait frames, some portrait ones via the EXIF Orientation tag
+- 12, 24 and 48 MP frames unless --sizes narrows it down
+
+The same name, sizes and seed always produce the same files. A finished
+corpus is reused by later runs; the large set takes a while to build and
+needs several GB of disk.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import struct
+
+from PIL import Image
+
+CORPORA = {"small": 100, "medium": 1000, "large": 5000}
+MEGAPIXELS = {12: (4000, 3000), 24: (6000, 4000), 48: (8000, 6000)}
+KINDS = (("jpeg_gps", 40), ("jpeg_exif", 30), ("jpeg_plain", 15), ("png", 15))
+CORPUS_VERSION = 2  # bump when the generated files change
+EXIF_THUMB_SIZE = (160, 120)
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".corpora")
+
+
+def corpus_dir(root, name, sizes, seed):
+    size_tag = "-".join(str(mp) for mp in sizes)
+    return os.path.join(root, f"{name}-{size_tag}mp-s{seed}-v{CORPUS_VERSION}")
+
+
+def photo_spec(seed, i, sizes):
+    """What photo i of a corpus looks like, from its own seeded RNG."""
+    rng = random.Random(f"{seed}:{i}")
+    kind = rng.choices([k for k, _ in KINDS], weights=[w for _, w in KINDS])[0]
+    mp = min(sizes) if kind == "png" else rng.choice(sizes)
+    width, height = MEGAPIXELS[mp]
+    portrait = rng.random() < 0.3
+    rotated = kind != "png" and portrait and rng.random() < 0.5  # stored landscape, flagged portrait
+    if portrait and not rotated:
+        width, height = height, width
+    return {
+        "name": f"IMG_{i:05d}.{'png' if kind == 'png' else 'jpg'}",
+        "kind": kind,
+        "megapixels": mp,
+        "size": (width, height),
+        "orientation": 6 if rotated else 1,
+        "colour_seed": rng.getrandbits(32),
+        "timestamp": f"2024:{rng.randint(1, 12):02d}:{rng.randint(1, 28):02d} "
+                     f"{rng.randint(6, 18):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+        "gps": (rng.uniform(25, 49), rng.uniform(67, 124)),
+    }
+
+
+def render(spec):
+    """A smooth colour field with some hard-edged blocks, so JPEG sizes are plausible."""
+    rng = random.Random(spec["colour_seed"])
+    width, height = spec["size"]
+    seed_img = Image.new("RGB", (16, 12))
+    seed_img.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(16 * 12)])
+    img = seed_img.resize((width, height), Image.Resampling.BICUBIC)
+    block = max(width, height) // 40
+    for _ in range(60):
+        x = rng.randrange(width - block)
+        y = rng.randrange(height - block)
+        img.paste((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (x, y, x + block, y + block))
+    return img
+
+
+def dms(value):
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    seconds = round(((value - degrees) * 60 - minutes) * 60, 2)
+    return (float(degrees), float(minutes), seconds)
+
+
+def exif_for(spec):
+    exif = Image.Exif()
+    exif[0x0112] = spec["orientation"]
+    exif[0x0132] = spec["timestamp"]
+    exif.get_ifd(0x8769)[0x9003] = spec["timestamp"]
+    if spec["kind"] == "jpeg_gps":
+        lat, lon = spec["gps"]
+        gps = exif.get_ifd(0x8825)
+        gps[1] = "N"
+        gps[2] = dms(lat)
+        gps[3] = "W"
+        gps[4] = dms(lon)
+    return exif
+
+
+def exif_thumbnail(img):
+    """A camera-style EXIF thumbnail: the frame letterboxed into 160x120 (120x160 for portrait)."""
+    box = EXIF_THUMB_SIZE if img.width >= img.height else EXIF_THUMB_SIZE[::-1]
+    ratio = min(box[0] / img.width, box[1] / img.height)
+    size = (round(img.width * ratio), round(img.height * ratio))
+    thumb = Image.new("RGB", box)
+    thumb.paste(img.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0),
+                ((box[0] - size[0]) // 2, (box[1] - size[1]) // 2))
+    buf = io.BytesIO()
+    thumb.save(buf, "JPEG", quality=75)
+    return buf.getvalue()
+
+
+def with_thumbnail(exif_bytes, thumb_jpeg):
+    """Links an IFD1 holding thumb_jpeg after IFD0, which Pillow can't write itself."""
+    tiff = bytearray(exif_bytes[6:])  # drop "Exif\0\0"; offsets count from the TIFF header
+    endian = '<' if tiff[:2] == b'II' else '>'
+    ifd0 = struct.unpack_from(endian + 'I', tiff, 4)[0]
+    entries = struct.unpack_from(endian + 'H', tiff, ifd0)[0]
+    if len(tiff) % 2:
+        tiff += b'\x00'
+    ifd1 = len(tiff)
+    struct.pack_into(endian + 'I', tiff, ifd0 + 2 + entries * 12, ifd1)
+    data_offset = ifd1 + 2 + 3 * 12 + 4
+    tiff += struct.pack(endian + 'H', 3)
+    tiff += struct.pack(endian + 'HHIH2x', 0x0103, 3, 1, 6)  # Compression: JPEG
+    tiff += struct.pack(endian + 'HHII', 0x0201, 4, 1, data_offset)
+    tiff += struct.pack(endian + 'HHII', 0x0202, 4, 1, len(thumb_jpeg))
+    tiff += struct.pack(endian + 'I', 0)
+    return b"Exif\x00\x00" + bytes(tiff) + thumb_jpeg
+
+
+def write_photo(folder, spec):
+    img = render(spec)
+    path = os.path.join(folder, spec["name"])
+    tmp_path = path + ".tmp"  # so an interrupted build never leaves a truncated photo behind
+    if spec["kind"] == "png":
+        img.save(tmp_path, "PNG", compress_level=1)
+    elif spec["kind"] == "jpeg_plain":
+        img.save(tmp_path, "JPEG", quality=90)
+    else:
+        exif = with_thumbnail(exif_for(spec).tobytes(), exif_thumbnail(img))
+        img.save(tmp_path, "JPEG", quality=90, exif=exif)
+    os.replace(tmp_path, path)
+
+
+def ensure_corpus(name, sizes=(12, 24, 48), seed=0, root=DEFAULT_ROOT, log=print):
+    """
+    Returns (photo_folder, logo_path, manifest) for the named corpus,
+    generating whatever is missing first.
+    """
+    count = CORPORA[name]
+    sizes = tuple(sorted(sizes))
+    base = corpus_dir(root, name, sizes, seed)
+    photo_folder = os.path.join(base, "photos")
+    logo_path = os.path.join(base, "logo.png")
+    manifest_path = os.path.join(base, "corpus.json")
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            return photo_folder, logo_path, json.load(f)
+
+    os.makedirs(photo_folder, exist_ok=True)
+    specs = [photo_spec(seed, i, sizes) for i in range(count)]
+    for i, spec in enumerate(specs, 1):
+        # Picks up where an interrupted build stopped
+        if not os.path.exists(os.path.join(photo_folder, spec["name"])):
+            write_photo(photo_folder, spec)
+        if log and (i % 100 == 0 or i == count):
+            log(f"  generated {i}/{count} photos")
+    Image.new("RGBA", (600, 300), (200, 30, 30, 255)).save(logo_path)
+
+    manifest = {
+        "name": name,
+        "count": count,
+        "sizes_mp": list(sizes),
+        "seed": seed,
+        "version": CORPUS_VERSION,
+        "bytes": sum(os.path.getsize(os.path.join(photo_folder, spec["name"])) for spec in specs),
+        "kinds": {kind: sum(1 for spec in specs if spec["kind"] == kind) for kind, _ in KINDS},
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return photo_folder, logo_path, manifest
+
+
+def parse_sizes(text):
+    sizes = tuple(int(part) for part in text.split(","))
+    unknown = [mp for mp in sizes if mp not in MEGAPIXELS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"sizes must be among {sorted(MEGAPIXELS)}")
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("name", choices=sorted(CORPORA, key=CORPORA.get))
+    parser.add_argument("--sizes", type=parse_sizes, default=(12, 24, 48), help="megapixel sizes, e.g. 12,48")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="where corpora are kept")
+    args = parser.parse_args()
+    photo_folder, _, manifest = ensure_corpus(args.name, args.sizes, args.seed, args.root)
+    print(f"{photo_folder}: {manifest['count']} photos, {manifest['bytes'] / 1e6:.0f} MB, {manifest['kinds']}")
+
+
+if __name__ == "__main__":
+    main()
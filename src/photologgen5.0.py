@@ -1,27 +1,77 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox
-from tkinter import ttk
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from reportlab.pdfbase.pdfmetrics import stringWidth
-from PIL import Image, ImageTk
+from PIL import Image, ExifTags
 import os
 from datetime import datetime
-import exifread
-from reportlab.lib import colors
-from reportlab.pdfbase.acroform import AcroForm
-import requests
 import threading
+import time
+import queue
 import shutil
-
-
-# Optional HEIC support
+import io
+import hashlib
+import tempfile
+import math
+import sys
+import mmap
+import struct
+import sqlite3
+import json
+import random
+import argparse
+import functools
+import glob
+import multiprocessing
+import concurrent.futures
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import closing
+
+
+# ReportLab, exifread, requests and pillow_heif are imported where they're first
+# needed, so the window comes up without paying for them (see benchmarks/bench_startup.py)
+
+# Tk, and PIL.ImageTk which imports it, only load for the window (load_tk): the
+# command line also runs on servers whose Python was built without Tk
+tk = ttk = filedialog = messagebox = ImageTk = None
+
+
+def load_tk():
+    """Imports tkinter and PIL.ImageTk into this module's globals, once; the CLI never calls it."""
+    global tk, ttk, filedialog, messagebox, ImageTk
+    if tk is None:
+        import tkinter
+        from tkinter import filedialog as tk_filedialog, messagebox as tk_messagebox, ttk as tk_ttk
+        from PIL import ImageTk as pil_imagetk
+        ttk, filedialog, messagebox, ImageTk = tk_ttk, tk_filedialog, tk_messagebox, pil_imagetk
+        tk = tkinter
+
+# Optional HEIC support, registered with Pillow the first time a HEIC/HEIF file is opened
+pillow_heif = None
+heif_checked = False
+heif_lock = threading.Lock()  # thumbnail threads can reach the first HEIC file together
+
+
+def register_heif_support():
+    """Imports pillow_heif and registers its opener once; returns False if it isn't installed."""
+    global pillow_heif, heif_checked
+    if heif_checked:
+        return pillow_heif is not None
+    with heif_lock:
+        if not heif_checked:
+            try:
+                import pillow_heif as heif_module
+            except ImportError:
+                heif_module = None
+            if heif_module is not None:
+                heif_module.register_heif_opener()
+                pillow_heif = heif_module
+            # Only now: another thread that sees heif_checked must also see pillow_heif
+            heif_checked = True
+    return pillow_heif is not None
+
+# Peak RSS for instrumentation (POSIX; Windows goes through psapi instead)
 try:
-    import pillow_heif
-    pillow_heif.register_heif_opener()
+    import resource
 except ImportError:
-    pillow_heif = None
+    resource = None
 
 # --- THEME COLORS ---
 BG = "#1e1e1e"
@@ -35,74 +85,750 @@ PHOTO_WIDTH = 4.5 * INCH
 PHOTO_HEIGHT = 3.3 * INCH
 MARGIN = 0.5 * INCH
 BOX_HEIGHT = 1.125 * INCH
+LOGO_DPI = 300  # the header logo is resampled once to this resolution at its printed size
+
+LOGO_BOX = (1.25 * INCH, 0.625 * INCH)
+
+# Form XObjects shared by every page
+PAGE_HEADER_FORM = "PhotologHeader"
+NOTES_BOX_FORM = "PhotologNotesBox"
+
+# Image preparation pool (1 = prepare photos serially in the generating thread)
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+PREPARE_WINDOW_PER_WORKER = 2  # photos in flight per worker before we wait on the canvas
+MEMORY_BUDGET_BYTES = 256 * 1024 * 1024  # prepared JPEGs held in RAM before spilling to scratch (None = never)
+
+# Sharded rendering: page ranges laid out in worker processes, then merged
+SHARD_MAX_PHOTOS = 400  # photos per partial PDF; bounds each worker's memory and evens out the load
+SHARD_POLL_INTERVAL = 0.1  # seconds between progress relays while parts render
+
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.heic', '.heif')
+RENAME_JOURNAL = ".photolog-rename.journal"  # left in the photo folder only if a "Photo N" rename is interrupted
+
+# EXIF tags get_photo_metadata needs
+EXIF_EXTENSIONS = ('.jpg', '.jpeg', '.tif', '.tiff', '.heic', '.heif')
+EXIF_DATETIME = 0x0132
+EXIF_DATETIME_ORIGINAL = 0x9003
+EXIF_IFD_POINTER = 0x8769
+GPS_IFD_POINTER = 0x8825
+GPS_TAGS = {1: 'GPSLatitudeRef', 2: 'GPSLatitude', 3: 'GPSLongitudeRef', 4: 'GPSLongitude'}
+
+# EXIF tags for upright thumbnails and previews
+EXIF_ORIENTATION = 0x0112
+EXIF_THUMBNAIL_OFFSET = 0x0201  # JPEGInterchangeFormat in IFD1
+EXIF_THUMBNAIL_LENGTH = 0x0202  # JPEGInterchangeFormatLength in IFD1
+ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+# Preview grid: rows of tiles kept alive above/below the viewport
+GRID_OVERSCAN_ROWS = 2
+GRID_RESIZE_DEBOUNCE_MS = 150  # reflow once the window stops resizing
+THUMBNAIL_WORKERS = min(4, DEFAULT_WORKERS)
+THUMBNAIL_POLL_MS = 50
+THUMB_PLACEHOLDER = "#3a3a3d"  # tile fill shown until the real thumbnail is decoded
+THUMBNAIL_SHARPEN_MS = 500  # re-render a tile showing a small embedded preview once it's been on screen this long
+
+# Full-size photo viewer
+VIEWER_WORKERS = 2
+VIEWER_POLL_MS = 30
+VIEWER_SETTLE_MS = 300  # re-render with LANCZOS once the user stays on a photo this long
+VIEWER_FAST_RESAMPLE = Image.Resampling.BILINEAR  # used while stepping through photos
+
+# Background metadata scan for the preview window
+METADATA_WORKERS = 8
+METADATA_POLL_MS = 100
+
+# Dad joke fetch: never hold up the window for it
+JOKE_TIMEOUT = 3  # seconds
+JOKE_POLL_MS = 100
+
+# Progress reporting while a photolog is generated
+PROGRESS_FRAME_MS = 100  # how often the app redraws the progress bar
+CLI_PROGRESS_INTERVAL = 1.0  # seconds between --progress lines
+
+# Decoded images kept in memory for the preview grid and photo viewer
+IMAGE_CACHE_BYTES = 192 * 1024 * 1024
+
+# Persistent thumbnail / PDF image cache
+CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+FINGERPRINT_CHUNK = 64 * 1024  # bytes hashed from the start and end of each photo
+DERIVATIVE_VERSION = 3  # bump when the way thumbnails or PDF images are rendered changes
+
+# PDF image profiles: resolution in the PHOTO_WIDTH x PHOTO_HEIGHT slot and JPEG quality
+OUTPUT_PROFILES = {
+    "draft": {"dpi": 100, "quality": 70},
+    "email": {"dpi": 180, "quality": 85},  # about the 800x600 / q85 images of earlier versions
+    "print": {"dpi": 300, "quality": 90},
+}
+DEFAULT_PROFILE = "email"
+# Note fields under each photo. Every widget costs the viewer an annotation to
+# parse and lay out when a page opens, which is what tablets feel on long logs.
+FIELD_STRATEGIES = {
+    "standard": "two note lines per photo, each with its own font and background",
+    "shared": "two note lines per photo using the form's default font",
+    "single": "one multi-line note field per photo",
+    "print": "no fields; the ruled notes box is filled in by hand",
+}
+DEFAULT_FIELDS = "standard"
+NOTE_FONT = ("Helv", 9)  # AcroForm default font for the "shared" and "single" fields (Helv = Helvetica)
+NOTE_FIELD_APPEARANCE = "PhotologNoteFieldAP"  # the one empty appearance stream those fields share
+PASSTHROUGH_QUALITY_SLACK = 5  # embed a JPEG as-is if its quality is at most this far above the profile's
+# IJG standard luminance quantization table (quality 50), for estimating a JPEG's quality
+STD_LUMINANCE_QT = (
+    16, 11, 10, 16, 24, 40, 51, 61, 12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56, 14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77, 24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101, 72, 92, 95, 98, 112, 100, 103, 99,
+)
+
+# Volume size estimate for stream_photolog's max_bytes rollover
+IMAGE_STREAM_OVERHEAD = 1.0  # JPEGs are embedded as binary streams (rl_config.useA85 off), byte for byte
+PHOTO_PAGE_OVERHEAD_BYTES = 4 * 1024  # label, notes box and two form fields per photo
+
+
+# ----------------- INSTRUMENTATION -----------------
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None if the platform won't say."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024  # Linux reports KiB
+    if os.name == 'nt':
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                    "PagefileUsage", "PeakPagefileUsage")]
+
+        try:
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            get_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_info.argtypes = [wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD]
+            if get_info(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+                return counters.PeakWorkingSetSize
+        except (OSError, AttributeError):
+            pass
+    return None
+
+
+class TraceSpan:
+    """One timed stage; record() adds counters such as bytes_out once they're known."""
+    def __init__(self, tracer, stage, photo, counters):
+        self.tracer = tracer
+        self.stage = stage
+        self.photo = photo
+        self.counters = counters
+
+    def record(self, **counters):
+        self.counters.update(counters)
+
+    def __enter__(self):
+        self.start = time.time()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add({
+            "stage": self.stage,
+            "photo": self.photo,
+            "start": self.start,
+            "wall": time.perf_counter() - self.wall_start,
+            "cpu": time.thread_time() - self.cpu_start,
+            "bytes_in": self.counters.get("bytes_in", 0),
+            "bytes_out": self.counters.get("bytes_out", 0),
+            "peak_rss": peak_rss_bytes(),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        })
+        return False
+
+
+class NullSpan:
+    """Stand-in returned by trace() while instrumentation is off."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def record(self, **counters):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """
+    Spans recorded for the stages of a photolog run (see trace()).
+
+    Each span has the wall and thread-CPU time of the stage, optional bytes
+    in/out, the photo it belongs to and the process's peak RSS when it ended.
+    Pool workers send their spans back with their results for merge().
+    """
+    def __init__(self):
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def span(self, stage, photo=None, **counters):
+        return TraceSpan(self, stage, photo, counters)
+
+    def add(self, span):
+        with self.lock:
+            self.spans.append(span)
+
+    def merge(self, spans):
+        with self.lock:
+            self.spans.extend(spans)
+
+    def summary(self):
+        """Totals per stage and wall time per stage for each photo."""
+        with self.lock:
+            spans = list(self.spans)
+        stages = {}
+        photos = {}
+        for span in spans:
+            totals = stages.setdefault(span["stage"], {
+                "count": 0, "wall_s": 0.0, "cpu_s": 0.0, "bytes_in": 0, "bytes_out": 0})
+            totals["count"] += 1
+            totals["wall_s"] += span["wall"]
+            totals["cpu_s"] += span["cpu"]
+            totals["bytes_in"] += span["bytes_in"]
+            totals["bytes_out"] += span["bytes_out"]
+            if span["photo"] is not None:
+                per_photo = photos.setdefault(str(span["photo"]), {})
+                per_photo[span["stage"]] = per_photo.get(span["stage"], 0.0) + span["wall"]
+        peaks = [span["peak_rss"] for span in spans if span["peak_rss"] is not None]
+        return {
+            "wall_s": (max(span["start"] + span["wall"] for span in spans) - min(span["start"] for span in spans)
+                       if spans else 0.0),
+            "peak_rss_bytes": max(peaks) if peaks else None,
+            "stages": stages,
+            "photos": photos,
+        }
+
+    def chrome_trace(self):
+        """The spans as Chrome trace events (open in chrome://tracing or Perfetto)."""
+        with self.lock:
+            spans = list(self.spans)
+        origin = min((span["start"] for span in spans), default=0.0)
+        events = []
+        for span in spans:
+            events.append({
+                "name": span["stage"],
+                "cat": "photolog",
+                "ph": "X",
+                "ts": round((span["start"] - origin) * 1e6),
+                "dur": round(span["wall"] * 1e6),
+                "pid": span["pid"],
+                "tid": span["tid"],
+                "args": {
+                    "photo": span["photo"],
+                    "cpu_ms": round(span["cpu"] * 1000, 3),
+                    "bytes_in": span["bytes_in"],
+                    "bytes_out": span["bytes_out"],
+                    "peak_rss": span["peak_rss"],
+                },
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_summary(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def write_chrome_trace(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+TRACER = None  # the active Tracer while instrumentation is on
+
+
+def start_tracing():
+    global TRACER
+    TRACER = Tracer()
+    return TRACER
+
+
+def stop_tracing():
+    global TRACER
+    tracer, TRACER = TRACER, None
+    return tracer
+
+
+def trace(stage, photo=None, **counters):
+    """Context manager timing `stage` while tracing is on; a shared no-op otherwise."""
+    if TRACER is None:
+        return NULL_SPAN
+    return TRACER.span(stage, photo, **counters)
+
+
+def traced(stage):
+    """Decorator timing every call as `stage`, tagged with its first argument (the photo path)."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(path, *args, **kwargs):
+            if TRACER is None:
+                return func(path, *args, **kwargs)
+            with TRACER.span(stage, path):
+                return func(path, *args, **kwargs)
+        return wrapper
+    return decorate
 
 
 # ----------------- METADATA (ORIGINAL STYLE) -----------------
+@traced("metadata")
 def get_photo_metadata(photo_path):
     """
     Returns (datetime, coords_str_or_None)
 
-    - Uses EXIF for JPG/JPEG/TIFF when available
+    - Uses EXIF for JPG/JPEG/TIFF/HEIC/HEIF when available (read_exif_fast,
+      falling back to exifread on anything it doesn't handle)
     - Falls back to file modification time
-    - HEIC/PNG still get a timestamp but usually no coords
+    - PNG still gets a timestamp but no coords
     """
     ext = os.path.splitext(photo_path)[1].lower()
     # Default: use file modification time
     dt = datetime.fromtimestamp(os.path.getmtime(photo_path))
     coords = None
 
-    # Only bother with EXIF on formats that usually have it in a way exifread can handle
-    if ext in ('.jpg', '.jpeg', '.tif', '.tiff'):
+    if ext in EXIF_EXTENSIONS:
         try:
-            with open(photo_path, 'rb') as f:
-                tags = exifread.process_file(f, details=False)
+            try:
+                tags = read_exif_fast(photo_path)
+            except ExifFormatError:
+                tags = read_exif_exifread(photo_path)
 
             # Timestamp
-            ts_tag = tags.get('EXIF DateTimeOriginal') or tags.get('Image DateTime')
-            if ts_tag:
+            ts = tags.get('DateTimeOriginal') or tags.get('DateTime')
+            if ts:
                 try:
-                    dt = datetime.strptime(str(ts_tag), '%Y:%m:%d %H:%M:%S')
+                    dt = datetime.strptime(ts, '%Y:%m:%d %H:%M:%S')
                 except Exception:
                     # If parsing fails, just keep file mtime
                     pass
 
             # GPS
-            lat_tag = tags.get('GPS GPSLatitude')
-            lon_tag = tags.get('GPS GPSLongitude')
-            lat_ref_tag = tags.get('GPS GPSLatitudeRef')
-            lon_ref_tag = tags.get('GPS GPSLongitudeRef')
-
-            if lat_tag and lon_tag and lat_ref_tag and lon_ref_tag:
-                # exifread gives numeric ratios in .values; the ref tags are usually "N","S","E","W"
-                lat_ref = str(lat_ref_tag).strip()
-                lon_ref = str(lon_ref_tag).strip()
-                lat_deg = convert_to_degrees(lat_tag.values, lat_ref)
-                lon_deg = convert_to_degrees(lon_tag.values, lon_ref)
+            lat = tags.get('GPSLatitude')
+            lon = tags.get('GPSLongitude')
+            lat_ref = tags.get('GPSLatitudeRef')
+            lon_ref = tags.get('GPSLongitudeRef')
+
+            if lat and lon and lat_ref and lon_ref:
+                lat_deg = convert_to_degrees(lat, lat_ref)
+                lon_deg = convert_to_degrees(lon, lon_ref)
                 coords = f"{lat_deg:.6f}, {lon_deg:.6f}"
         except Exception as e:
             # Don't crash if EXIF is weird, just log and fall back
             print(f"EXIF read failed for {photo_path}: {e}")
 
-    # For HEIC/PNG/etc we keep dt from file mtime and coords=None
+    # For PNG/etc we keep dt from file mtime and coords=None
     return dt, coords
 
 
 def convert_to_degrees(value, ref):
-    d = float(value[0].num) / float(value[0].den)
-    m = float(value[1].num) / float(value[1].den)
-    s = float(value[2].num) / float(value[2].den)
+    """(degrees, minutes, seconds) floats + "N"/"S"/"E"/"W" -> signed decimal degrees."""
+    d, m, s = value[:3]
     degrees = d + (m / 60.0) + (s / 3600.0)
     ref = ref.upper()
     return -degrees if ref in ('S', 'W') else degrees
 
 
+def read_exif_exifread(photo_path):
+    """Full exifread parse, normalized to the same dict read_exif_fast returns."""
+    import exifread
+
+    with open(photo_path, 'rb') as f:
+        tags = exifread.process_file(f, details=False)
+
+    result = {}
+    for key, name in (('EXIF DateTimeOriginal', 'DateTimeOriginal'), ('Image DateTime', 'DateTime'),
+                      ('GPS GPSLatitudeRef', 'GPSLatitudeRef'), ('GPS GPSLongitudeRef', 'GPSLongitudeRef')):
+        if tags.get(key):
+            result[name] = str(tags[key]).strip()
+    for key, name in (('GPS GPSLatitude', 'GPSLatitude'), ('GPS GPSLongitude', 'GPSLongitude')):
+        if tags.get(key):
+            # exifread gives numeric ratios in .values
+            result[name] = tuple(float(v.num) / float(v.den) for v in tags[key].values)
+    return result
+
+
+# ----------------- FAST EXIF -----------------
+class ExifFormatError(ValueError):
+    """The fast EXIF reader met a layout it doesn't handle; use exifread instead."""
+
+
+def read_exif_fast(photo_path):
+    """
+    Reads just DateTimeOriginal/DateTime and the four GPS position tags.
+
+    Memory-maps the file and walks straight to IFD0, the Exif IFD and the GPS
+    IFD of the TIFF block inside a JPEG APP1 segment, a TIFF file, or the Exif
+    item of a HEIC/HEIF container. Returns {} when the file has no EXIF;
+    raises ExifFormatError on anything unusual.
+    """
+    try:
+        with open(photo_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            start = _find_tiff_header(buf)
+            if start is None:
+                return {}
+            return _read_tiff_tags(buf, start)
+    except ExifFormatError:
+        raise
+    except (OSError, ValueError, IndexError, struct.error, ZeroDivisionError) as e:
+        # Empty files can't be mapped; truncated/odd files fail struct unpacks
+        raise ExifFormatError(str(e)) from e
+
+
+def _find_tiff_header(buf):
+    head = buf[:12]
+    if head[:2] == b'\xff\xd8':
+        return _jpeg_exif_offset(buf)
+    if head[:4] in (b'II*\x00', b'MM\x00*'):
+        return 0
+    if head[4:8] == b'ftyp':
+        return _heif_exif_offset(buf)
+    raise ExifFormatError("unrecognised container")
+
+
+def _jpeg_exif_offset(buf):
+    pos = 2
+    while pos + 4 <= len(buf):
+        if buf[pos] != 0xFF:
+            raise ExifFormatError("bad JPEG marker")
+        marker = buf[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker in (0xDA, 0xD9):  # start of scan / end of image: no EXIF before the pixels
+            return None
+        seg_len = struct.unpack_from('>H', buf, pos + 2)[0]
+        if marker == 0xE1 and buf[pos + 4:pos + 10] == b'Exif\x00\x00':
+            return pos + 10
+        pos += 2 + seg_len
+    return None
+
+
+def _iter_boxes(buf, start, end):
+    """Yields (type, payload_start, box_end) for ISO-BMFF boxes in buf[start:end]."""
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', buf, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise ExifFormatError("bad HEIF box size")
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def _read_uint(buf, pos, size):
+    if size == 0:
+        return 0, pos
+    fmt = {2: '>H', 4: '>I', 8: '>Q'}.get(size)
+    if fmt is None:
+        raise ExifFormatError("unsupported HEIF field size")
+    return struct.unpack_from(fmt, buf, pos)[0], pos + size
+
+
+def _heif_exif_offset(buf):
+    meta = next((b for b in _iter_boxes(buf, 0, len(buf)) if b[0] == b'meta'), None)
+    if meta is None:
+        return None
+    _, meta_start, meta_end = meta
+    boxes = {t: (s, e) for t, s, e in _iter_boxes(buf, meta_start + 4, meta_end)}  # meta is a FullBox
+    if b'iinf' not in boxes or b'iloc' not in boxes:
+        return None
+
+    # iinf: find the item whose type is 'Exif'
+    start, end = boxes[b'iinf']
+    version = buf[start]
+    pos = start + 4 + (2 if version == 0 else 4)
+    exif_id = None
+    for box_type, p, _ in _iter_boxes(buf, pos, end):
+        if box_type != b'infe' or buf[p] < 2:
+            continue
+        item_id, p = _read_uint(buf, p + 4, 2 if buf[p] == 2 else 4)
+        if buf[p + 2:p + 6] == b'Exif':
+            exif_id = item_id
+            break
+    if exif_id is None:
+        return None
+
+    # iloc: where that item's bytes live in the file
+    start, _ = boxes[b'iloc']
+    version = buf[start]
+    pos = start + 4
+    offset_size, length_size = buf[pos] >> 4, buf[pos] & 0x0F
+    base_offset_size, index_size = buf[pos + 1] >> 4, buf[pos + 1] & 0x0F
+    if version not in (1, 2):
+        index_size = 0
+    item_count, pos = _read_uint(buf, pos + 2, 2 if version < 2 else 4)
+    for _ in range(item_count):
+        item_id, pos = _read_uint(buf, pos, 2 if version < 2 else 4)
+        construction_method = 0
+        if version in (1, 2):
+            construction_method = struct.unpack_from('>H', buf, pos)[0] & 0x0F
+            pos += 2
+        pos += 2  # data_reference_index
+        base_offset, pos = _read_uint(buf, pos, base_offset_size)
+        extent_count, pos = _read_uint(buf, pos, 2)
+        extents = []
+        for _ in range(extent_count):
+            _, pos = _read_uint(buf, pos, index_size)
+            extent_offset, pos = _read_uint(buf, pos, offset_size)
+            extent_length, pos = _read_uint(buf, pos, length_size)
+            extents.append((extent_offset, extent_length))
+        if item_id == exif_id:
+            if construction_method != 0 or len(extents) != 1:
+                raise ExifFormatError("unsupported HEIF Exif item layout")
+            item_start = base_offset + extents[0][0]
+            # The Exif item starts with a 4-byte offset to the TIFF header
+            tiff_offset = struct.unpack_from('>I', buf, item_start)[0]
+            return item_start + 4 + tiff_offset
+    return None
+
+
+_TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+
+def _read_ifd(buf, base, offset, endian, wanted):
+    """Returns {tag: value} for the tags in `wanted` from the IFD at base + offset."""
+    pos = base + offset
+    count = struct.unpack_from(endian + 'H', buf, pos)[0]
+    if count > 1000:
+        raise ExifFormatError("implausible IFD entry count")
+    values = {}
+    for i in range(count):
+        tag, typ, n, raw = struct.unpack_from(endian + 'HHI4s', buf, pos + 2 + i * 12)
+        if tag not in wanted:
+            continue
+        size = _TIFF_TYPE_SIZES.get(typ)
+        if size is None:
+            raise ExifFormatError(f"unknown TIFF type {typ}")
+        if size * n <= 4:
+            data_pos = pos + 2 + i * 12 + 8
+        else:
+            data_pos = base + struct.unpack(endian + 'I', raw)[0]
+        if typ == 2:  # ASCII
+            values[tag] = bytes(buf[data_pos:data_pos + n]).split(b'\x00', 1)[0].decode('ascii', 'replace').strip()
+        elif typ in (3, 4):  # SHORT / LONG
+            values[tag] = struct.unpack_from(endian + ('H' if typ == 3 else 'I'), buf, data_pos)[0]
+        elif typ == 5:  # RATIONAL
+            nums = struct.unpack_from(endian + 'I' * (2 * n), buf, data_pos)
+            values[tag] = tuple(nums[k] / nums[k + 1] for k in range(0, len(nums), 2))
+        else:
+            raise ExifFormatError(f"unexpected TIFF type {typ} for tag {tag:#x}")
+    return values
+
+
+def _read_tiff_tags(buf, base):
+    order = buf[base:base + 2]
+    if order == b'II':
+        endian = '<'
+    elif order == b'MM':
+        endian = '>'
+    else:
+        raise ExifFormatError("bad TIFF byte order")
+    magic, ifd0 = struct.unpack_from(endian + 'HI', buf, base + 2)
+    if magic != 42:
+        raise ExifFormatError("bad TIFF magic")
+
+    ifd0_tags = _read_ifd(buf, base, ifd0, endian, {EXIF_DATETIME, EXIF_IFD_POINTER, GPS_IFD_POINTER})
+    result = {}
+    if EXIF_DATETIME in ifd0_tags:
+        result['DateTime'] = ifd0_tags[EXIF_DATETIME]
+    if EXIF_IFD_POINTER in ifd0_tags:
+        exif_tags = _read_ifd(buf, base, ifd0_tags[EXIF_IFD_POINTER], endian, {EXIF_DATETIME_ORIGINAL})
+        if EXIF_DATETIME_ORIGINAL in exif_tags:
+            result['DateTimeOriginal'] = exif_tags[EXIF_DATETIME_ORIGINAL]
+    if GPS_IFD_POINTER in ifd0_tags:
+        gps_tags = _read_ifd(buf, base, ifd0_tags[GPS_IFD_POINTER], endian, set(GPS_TAGS))
+        for tag, name in GPS_TAGS.items():
+            if tag in gps_tags:
+                result[name] = gps_tags[tag]
+    return result
+
+
+# ----------------- METADATA SCAN / INDEX -----------------
+def list_photos(photo_folder):
+    """os.DirEntry for every supported image in the folder (stat data comes with the listing)."""
+    return [
+        entry for entry in os.scandir(photo_folder)
+        if entry.is_file() and entry.name.lower().endswith(PHOTO_EXTENSIONS)
+    ]
+
+
+def read_photo_metadata(path):
+    """get_photo_metadata that never raises: falls back to (mtime, None)."""
+    try:
+        return get_photo_metadata(path)
+    except Exception as e:
+        print(f"Metadata read failed for {path}: {e}")
+        return datetime.fromtimestamp(os.path.getmtime(path)), None
+
+
+class MetadataScanner:
+    """
+    Reads (timestamp, coords) for a set of photos on a background thread pool.
+
+    EXIF reads are mostly I/O latency on network drives, so threads overlap
+    them well. Callers poll done() from the Tk thread and only block in
+    result() for photos they actually need right now.
+    """
+    def __init__(self, paths, workers=METADATA_WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="metadata")
+        self.futures = {path: self.pool.submit(read_photo_metadata, path) for path in paths}
+
+    def done(self, path):
+        return self.futures[path].done()
 
+    def result(self, path):
+        return self.futures[path].result()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class MetadataIndex:
+    """
+    SQLite index (in the user cache dir) of each folder's photo metadata and
+    its last arrangement, so reopening an unchanged job folder skips EXIF
+    parsing and comes back in the order the user left it.
+
+    Photos are keyed by (folder, file name) and trusted only while their size
+    and mtime match. Use from the Tk thread only.
+    """
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(user_cache_dir(), "metadata.sqlite3")
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS photos (
+                folder TEXT NOT NULL,
+                name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                timestamp TEXT NOT NULL,
+                coords TEXT,
+                PRIMARY KEY (folder, name)
+            );
+            CREATE TABLE IF NOT EXISTS arrangements (
+                folder TEXT PRIMARY KEY,
+                photo_order TEXT NOT NULL,
+                removed TEXT NOT NULL
+            );
+        """)
+
+    @staticmethod
+    def folder_key(folder):
+        return os.path.normcase(os.path.abspath(folder))
+
+    def lookup(self, folder):
+        """{name: (size, mtime_ns, datetime, coords)} for everything indexed in folder."""
+        rows = self.conn.execute(
+            "SELECT name, size, mtime_ns, timestamp, coords FROM photos WHERE folder = ?",
+            (self.folder_key(folder),)
+        )
+        return {name: (size, mtime_ns, datetime.fromisoformat(ts), coords)
+                for name, size, mtime_ns, ts, coords in rows}
+
+    def store(self, folder, rows):
+        """rows: (name, size, mtime_ns, datetime, coords)"""
+        key = self.folder_key(folder)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO photos VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, name, size, mtime_ns, ts.isoformat(), coords)
+                 for name, size, mtime_ns, ts, coords in rows]
+            )
+
+    def prune(self, folder, present_names):
+        """Drops entries for files no longer in the folder."""
+        key = self.folder_key(folder)
+        stale = set(self.lookup(folder)) - set(present_names)
+        with self.conn:
+            self.conn.executemany("DELETE FROM photos WHERE folder = ? AND name = ?",
+                                  [(key, name) for name in stale])
+
+    def rename(self, folder, renames):
+        """
+        Carries entries over a {old_name: new_name} rename (e.g. rename_photos):
+        the photos' metadata and the names in the folder's saved arrangement,
+        so a later 'saved' sort keeps the order the files were renamed in.
+        """
+        key = self.folder_key(folder)
+        known = self.lookup(folder)
+        moved = [(key, new, size, mtime_ns, ts.isoformat(), coords)
+                 for old, new in renames.items() if old in known
+                 for size, mtime_ns, ts, coords in [known[old]]]
+        order, removed = self.load_arrangement(folder)
+        with self.conn:
+            self.conn.executemany("DELETE FROM photos WHERE folder = ? AND name = ?",
+                                  [(key, old) for old in renames])
+            self.conn.executemany("INSERT OR REPLACE INTO photos VALUES (?, ?, ?, ?, ?, ?)", moved)
+            if order is not None:
+                self.conn.execute(
+                    "UPDATE arrangements SET photo_order = ?, removed = ? WHERE folder = ?",
+                    (json.dumps([renames.get(name, name) for name in order]),
+                     json.dumps(sorted(renames.get(name, name) for name in removed)), key)
+                )
+
+    def load_arrangement(self, folder):
+        """(names in the user's last order, removed names), or (None, set()) if never saved."""
+        row = self.conn.execute(
+            "SELECT photo_order, removed FROM arrangements WHERE folder = ?",
+            (self.folder_key(folder),)
+        ).fetchone()
+        if row is None:
+            return None, set()
+        return json.loads(row[0]), set(json.loads(row[1]))
+
+    def save_arrangement(self, folder, order, removed):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO arrangements VALUES (?, ?, ?)",
+                (self.folder_key(folder), json.dumps(list(order)), json.dumps(sorted(removed)))
+            )
+
+
+def open_metadata_index():
+    """The user's MetadataIndex, or None when it can't be opened."""
+    try:
+        return MetadataIndex()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Metadata index disabled: {e}")
+        return None
+
+
+
+@traced("open")
 def open_image_for_pillow(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.heic', '.heif'):
+        register_heif_support()
     try:
         img = Image.open(path)
         return img
     except Exception as e:
-        ext = os.path.splitext(path)[1].lower()
         if ext in ('.heic', '.heif') and pillow_heif is None:
             raise RuntimeError(
                 f"Unable to open HEIC image '{os.path.basename(path)}'. "
@@ -111,136 +837,1948 @@ def open_image_for_pillow(path):
         raise
 
 
-def compress_image(photo_path, max_size=(800, 600)):
-    img = open_image_for_pillow(photo_path)
-    img = img.convert('RGB')
-    img.thumbnail(max_size, Image.Resampling.LANCZOS)
-    temp_path = photo_path + "_compressed.jpg"
-    img.save(temp_path, "JPEG", quality=85, optimize=True)
-    return temp_path
+def open_image_scaled(path, target_size):
+    """
+    Opens an image decoded at the smallest size that still covers target_size
+    once fitted with thumbnail(); the caller still does the final resize.
+
+    - JPEG: DCT-scaled decode (1/2, 1/4, 1/8) through Pillow's draft mode
+    - HEIC/HEIF: pillow_heif's draft picks a large-enough embedded thumbnail, if any
+    - anything else (PNG, TIFF...) decodes at full size
+    """
+    img = open_image_for_pillow(path)
+    scale = min(target_size[0] / img.width, target_size[1] / img.height)
+    if scale < 1:
+        need = (max(1, math.ceil(img.width * scale)), max(1, math.ceil(img.height * scale)))
+        img.draft(None, need)
+    return img
+
+
+def exif_orientation(img):
+    """The EXIF Orientation (1-8) of an opened image; 1 when there's none or it can't be read."""
+    try:
+        orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+    except Exception:
+        return 1
+    return orientation if orientation in ORIENTATION_TRANSPOSE else 1
+
+
+def stored_box(box, orientation):
+    """box as it applies to the stored pixels of a photo with this orientation."""
+    return (box[1], box[0]) if orientation >= 5 else box
+
+
+def make_upright(img, orientation):
+    method = ORIENTATION_TRANSPOSE.get(orientation)
+    return img.transpose(method) if method is not None else img
+
+
+def fitted_size(size, box):
+    """size scaled down (never up) to fit inside box, keeping its aspect ratio."""
+    ratio = min(box[0] / size[0], box[1] / size[1], 1)
+    return max(1, round(size[0] * ratio)), max(1, round(size[1] * ratio))
+
+
+def fit_image(path, box, resample=Image.Resampling.LANCZOS):
+    """Opens the photo upright, scaled down (never up) to fit inside box."""
+    img = open_image_scaled(path, box)
+    orientation = exif_orientation(img)
+    size = fitted_size(img.size, stored_box(box, orientation))
+    if size == img.size:
+        img.load()
+    else:
+        img = img.resize(size, resample)
+    return make_upright(img, orientation)
+
+
+def load_embedded_preview(path, size):
+    """
+    The photo's embedded preview, upright and fitted to size; (None, False) if it has none.
+
+    - JPEG: the EXIF thumbnail (IFD1), turned with the photo's Orientation tag and
+      cropped to the photo's aspect ratio (cameras letterbox 3:2 frames into 160x120)
+    - HEIC/HEIF: the smallest thumbnail item, which pillow_heif hands over upright
+
+    Returns (image, sharp). A preview smaller than the fitted size is scaled up
+    to it, so the tile doesn't change size when the sharp render replaces it;
+    sharp is False then.
+    """
+    img = open_image_for_pillow(path)
+    if img.format == "HEIF":
+        full_size = img.size
+        if img.draft(None, fitted_size(full_size, size)) is None and img.draft(None, (1, 1)) is None:
+            return None, False
+        preview, orientation = img, 1
+    else:
+        raw = img.info.get("exif")
+        if not raw:
+            return None, False
+        ifd1 = img.getexif().get_ifd(ExifTags.IFD.IFD1)
+        offset, length = ifd1.get(EXIF_THUMBNAIL_OFFSET), ifd1.get(EXIF_THUMBNAIL_LENGTH)
+        if not offset or not length:
+            return None, False
+        tiff = raw[6:] if raw.startswith(b"Exif\x00\x00") else raw  # IFD offsets count from the TIFF header
+        try:
+            preview = Image.open(io.BytesIO(tiff[offset:offset + length]))
+            preview.load()
+        except OSError:
+            return None, False  # a broken thumbnail says nothing about the photo itself
+        full_size = img.size
+        orientation = exif_orientation(img)
+
+        # Crop away letterboxing so the preview has the photo's shape
+        aspect = full_size[0] / full_size[1]
+        if preview.width / preview.height > aspect * 1.02:
+            width = round(preview.height * aspect)
+            left = (preview.width - width) // 2
+            preview = preview.crop((left, 0, left + width, preview.height))
+        elif preview.width / preview.height < aspect / 1.02:
+            height = round(preview.width / aspect)
+            top = (preview.height - height) // 2
+            preview = preview.crop((0, top, preview.width, top + height))
+
+    target = fitted_size(full_size, stored_box(size, orientation))
+    sharp = preview.width >= target[0] and preview.height >= target[1]
+    if preview.size != target:
+        preview = preview.resize(target, Image.Resampling.LANCZOS if sharp else Image.Resampling.BILINEAR)
+    return make_upright(preview, orientation), sharp
+
+
+# ----------------- DERIVATIVE CACHE -----------------
+def user_cache_dir():
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser(r'~\AppData\Local')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'photolog_generator')
+
+
+def photo_fingerprint(path):
+    """
+    Content fingerprint: size + mtime + hash of the first/last FINGERPRINT_CHUNK bytes.
+
+    The path isn't part of it, so renaming a photo (rename_photos keeps mtime)
+    still finds its cached derivatives, while editing it does not.
+    """
+    st = os.stat(path)
+    h = hashlib.sha1(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    with open(path, 'rb') as f:
+        h.update(f.read(FINGERPRINT_CHUNK))
+        if st.st_size > 2 * FINGERPRINT_CHUNK:
+            f.seek(-FINGERPRINT_CHUNK, os.SEEK_END)
+            h.update(f.read(FINGERPRINT_CHUNK))
+    return h.hexdigest()
+
+
+class DerivativeCache:
+    """
+    On-disk cache of grid thumbnails and PDF-ready JPEGs, keyed by
+    (photo fingerprint, target profile).
+
+    Entries are plain files written atomically, so pool workers can share it.
+    Hits bump the file mtime; trim() evicts least recently used entries once
+    the cache is over max_bytes.
+    """
+    def __init__(self, root=None, max_bytes=CACHE_MAX_BYTES):
+        self.root = root or os.path.join(user_cache_dir(), "derivatives")
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_path(self, fingerprint, profile):
+        key = hashlib.sha1(f"{DERIVATIVE_VERSION}:{fingerprint}:{profile}".encode()).hexdigest()
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, fingerprint, profile):
+        path = self._entry_path(fingerprint, profile)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, fingerprint, profile, data):
+        path = self._entry_path(fingerprint, profile)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # A full or read-only cache shouldn't fail the job
+            print(f"Cache write failed for {path}: {e}")
+
+    def trim(self):
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def open_derivative_cache():
+    """The user's DerivativeCache, or None when the cache dir can't be created."""
+    try:
+        return DerivativeCache()
+    except OSError as e:
+        print(f"Derivative cache disabled: {e}")
+        return None
+
+
+def load_thumbnail(path, size, cache=None, quick=False):
+    """
+    Returns (PIL thumbnail fitted to size, sharp), from the derivative cache when possible.
+
+    Otherwise the photo is decoded at reduced resolution, or with quick=True
+    its embedded preview is used if it has one (see load_embedded_preview);
+    sharp is False when that preview was smaller than the thumbnail, and a
+    later call without quick gives the proper render.
+    """
+    if cache:
+        fingerprint = photo_fingerprint(path)
+        profile = f"thumb:{size[0]}x{size[1]}"
+        data = cache.get(fingerprint, profile)
+        if data:
+            return Image.open(io.BytesIO(data)), True
+
+    if quick:
+        preview, sharp = load_embedded_preview(path, size)
+        if preview is not None:
+            return preview, sharp
+
+    img = open_image_scaled(path, size)
+    orientation = exif_orientation(img)
+    img.thumbnail(stored_box(size, orientation), Image.Resampling.LANCZOS)
+    img = make_upright(img, orientation)
+
+    if cache:
+        buf = io.BytesIO()
+        if img.mode in ('RGB', 'L'):
+            img.save(buf, "JPEG", quality=90)
+        else:
+            img.save(buf, "PNG")
+        cache.put(fingerprint, profile, buf.getvalue())
+    return img, True
+
+
+class ThumbnailLoader:
+    """
+    Decodes preview thumbnails on a few background threads.
+
+    The Tk thread calls request() with the paths it wants, most urgent first;
+    each call replaces whatever was still queued, so photos that scrolled far
+    away are never decoded. Paths get a quick thumbnail (embedded preview when
+    there is one); paths under `sharpen` get the full-quality render. Finished
+    thumbnails come back from results(), which never blocks, as
+    (path, PIL image or None for unreadable files, sharp).
+    """
+    def __init__(self, size, cache=None, workers=THUMBNAIL_WORKERS):
+        self.size = size
+        self.cache = cache
+        self.cond = threading.Condition()
+        self.pending = deque()  # (path, sharpen) waiting for a worker, most urgent first
+        self.busy = set()  # (path, sharpen) being decoded right now
+        self.finished = queue.SimpleQueue()  # (path, PIL image or None, sharp)
+        self.closed = False
+        for i in range(workers):
+            threading.Thread(target=self.work, name=f"thumbnail-{i}", daemon=True).start()
+
+    def request(self, paths, sharpen=()):
+        jobs = [(path, False) for path in paths] + [(path, True) for path in sharpen]
+        with self.cond:
+            self.pending = deque(job for job in jobs if job not in self.busy)
+            self.cond.notify_all()
+
+    def results(self):
+        done = []
+        while True:
+            try:
+                done.append(self.finished.get_nowait())
+            except queue.Empty:
+                return done
+
+    def work(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    return
+                job = self.pending.popleft()
+                self.busy.add(job)
+            path, sharpen = job
+            try:
+                img, sharp = load_thumbnail(path, self.size, self.cache, quick=not sharpen)
+                img.load()
+            except Exception as e:
+                print(f"Failed to load {path}: {e}")
+                img, sharp = None, True
+            self.finished.put((path, img, sharp))
+            with self.cond:
+                self.busy.discard(job)
+
+    def shutdown(self):
+        """Drops queued work; decodes already running finish in the background."""
+        with self.cond:
+            self.closed = True
+            self.pending.clear()
+            self.cond.notify_all()
+
+
+# ----------------- IN-MEMORY IMAGE CACHE -----------------
+class ImageCache:
+    """
+    LRU cache of decoded Pillow images, bounded by an estimate of their pixel bytes.
+
+    The preview grid and the photo viewer keep their decoded images here and
+    only turn them into Tk images while they're on screen. The cache outlives
+    preview windows, so their keys include the file's (size, mtime_ns): a path
+    can hold a different photo after a rename or an edit. Use from the Tk
+    thread only.
+    """
+    def __init__(self, max_bytes=IMAGE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (PIL image, nbytes), least recently used first
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def image_bytes(img):
+        return img.width * img.height * len(img.getbands())
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, img):
+        self.discard(key)
+        nbytes = self.image_bytes(img)
+        self.entries[key] = (img, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def summary(self):
+        """One line for the console, e.g. when a preview window closes."""
+        stats = self.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = f"{stats['hits'] / lookups:.0%}" if lookups else "n/a"
+        return (f"{stats['entries']} images, {stats['bytes'] / 2**20:.0f} MiB; "
+                f"{stats['hits']} hits / {stats['misses']} misses ({hit_rate}), {stats['evictions']} evictions")
+
+
+# ----------------- PDF IMAGE PREPARATION -----------------
+def profile_size(profile):
+    """Pixel box a photo is fitted into for an OUTPUT_PROFILES entry."""
+    dpi = OUTPUT_PROFILES[profile]["dpi"]
+    return math.ceil(PHOTO_WIDTH / INCH * dpi), math.ceil(PHOTO_HEIGHT / INCH * dpi)
+
+
+def estimate_jpeg_quality(img):
+    """IJG-style quality (1-100) of an opened JPEG, from its luminance table; None if unknown."""
+    tables = getattr(img, "quantization", None)
+    if not tables or 0 not in tables or len(tables[0]) != 64:
+        return None
+    scale = sum(tables[0]) * 100 / sum(STD_LUMINANCE_QT)
+    quality = (200 - scale) / 2 if scale <= 100 else 5000 / scale
+    return max(1, min(100, round(quality)))
+
+
+def strip_jpeg_metadata(data):
+    """
+    Drops the APP1-APP13/APP15 (EXIF, XMP, ICC, ...) and COM segments from JPEG
+    bytes. JFIF/Adobe headers, tables and the scan data are copied untouched.
+    """
+    out = [data[:2]]
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            raise ValueError("malformed JPEG segment")
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker == 0xDA:  # start of scan: the rest is image data
+            out.append(data[pos:])
+            break
+        length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        if not (0xE1 <= marker <= 0xED or marker in (0xEF, 0xFE)):
+            out.append(data[pos:pos + 2 + length])
+        pos += 2 + length
+    return b"".join(out)
+
+
+def passthrough_jpeg(photo_path, profile):
+    """
+    The photo's own JPEG bytes (metadata stripped) if it can go into the PDF
+    without a re-encode: an upright (no EXIF rotation) baseline 8-bit
+    RGB/greyscale JPEG that already fits the profile's box at no more than
+    about its quality. Otherwise None.
+    """
+    max_size = profile_size(profile)
+    try:
+        with open_image_for_pillow(photo_path) as img:
+            # Stripping the metadata drops the Orientation tag, so rotated photos get re-encoded upright
+            if (img.format != "JPEG" or img.mode not in ("RGB", "L")
+                    or img.info.get("progressive") or img.info.get("progression")
+                    or img.width > max_size[0] or img.height > max_size[1]
+                    or exif_orientation(img) != 1):
+                return None
+            quality = estimate_jpeg_quality(img)
+        if quality is None or quality > OUTPUT_PROFILES[profile]["quality"] + PASSTHROUGH_QUALITY_SLACK:
+            return None
+        with open(photo_path, "rb") as f:
+            return strip_jpeg_metadata(f.read())
+    except (OSError, ValueError, struct.error):
+        return None  # let the normal decode path report real problems
+
+
+def compress_image(photo_path, profile=DEFAULT_PROFILE, cache=None):
+    """
+    Returns JPEG bytes for the photo, upright, at the output profile's size and
+    quality, without touching the disk. JPEGs that already fit the profile are
+    embedded as-is (see passthrough_jpeg).
+    """
+    max_size = profile_size(profile)
+    quality = OUTPUT_PROFILES[profile]["quality"]
+    with trace("compress_image", photo_path) as span:
+        with trace("passthrough_check", photo_path):
+            data = passthrough_jpeg(photo_path, profile)
+        if data:
+            span.record(bytes_out=len(data))
+            return data
+
+        if cache:
+            with trace("cache_lookup", photo_path):
+                fingerprint = photo_fingerprint(photo_path)
+                cache_profile = f"pdf:{max_size[0]}x{max_size[1]}:q{quality}"
+                data = cache.get(fingerprint, cache_profile)
+            if data:
+                span.record(bytes_out=len(data))
+                return data
+
+        with trace("decode", photo_path, bytes_in=os.path.getsize(photo_path) if TRACER else 0):
+            img = open_image_scaled(photo_path, max_size)
+            orientation = exif_orientation(img)
+            img.load()
+        with trace("resample", photo_path):
+            img = img.convert('RGB')
+            img.thumbnail(stored_box(max_size, orientation), Image.Resampling.LANCZOS)
+            img = make_upright(img, orientation)
+        with trace("encode", photo_path) as encode_span:
+            buf = io.BytesIO()
+            img.save(buf, "JPEG", quality=quality, optimize=True)
+            data = buf.getvalue()
+            encode_span.record(bytes_out=len(data))
+
+        if cache:
+            cache.put(fingerprint, cache_profile, data)
+        span.record(bytes_out=len(data))
+        return data
+
+
+def compress_image_traced(photo_path, profile=DEFAULT_PROFILE, cache=None):
+    """compress_image for pool workers while tracing is on: returns (jpeg_bytes, spans)."""
+    global TRACER
+    TRACER = Tracer()
+    try:
+        return compress_image(photo_path, profile, cache=cache), TRACER.spans
+    finally:
+        TRACER = None
+
+
+class JpegImage:
+    """
+    Already-encoded JPEG bytes that c.drawImage embeds as-is.
+
+    ReportLab names image XObjects from str() for anything that isn't an
+    ImageReader and pulls the data through jpeg_fh(), so this skips the full RGB
+    decode ImageReader does just to fingerprint the image.
+    """
+    def __init__(self, data):
+        self.data = data
+        self.digest = hashlib.sha1(data).hexdigest()
+
+    def __str__(self):
+        return f"jpeg:{self.digest}"
+
+    def jpeg_fh(self):
+        return io.BytesIO(self.data)
+
+
+class PreparedImageSpool:
+    """
+    Holds prepared JPEGs between the preparation pool and the canvas.
+
+    Buffers stay in memory until memory_budget bytes are held; past that they
+    spill to a private scratch directory (never next to the source photos),
+    which close() removes.
+    """
+    def __init__(self, memory_budget=MEMORY_BUDGET_BYTES, scratch_dir=None):
+        self.memory_budget = memory_budget
+        self.scratch_dir = scratch_dir
+        self.held_bytes = 0
+        self._scratch = None
+        self._spilled = 0
+
+    def put(self, data):
+        if self.memory_budget is None or self.held_bytes + len(data) <= self.memory_budget:
+            self.held_bytes += len(data)
+            return data
+        if self._scratch is None:
+            self._scratch = tempfile.mkdtemp(prefix="photolog_", dir=self.scratch_dir)
+        path = os.path.join(self._scratch, f"{self._spilled}.jpg")
+        self._spilled += 1
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def take(self, handle):
+        if isinstance(handle, bytes):
+            self.held_bytes -= len(handle)
+            return handle
+        with open(handle, 'rb') as f:
+            data = f.read()
+        os.remove(handle)
+        return data
+
+    def close(self):
+        if self._scratch:
+            shutil.rmtree(self._scratch, ignore_errors=True)
+            self._scratch = None
+
+
+def iter_prepared_photos(photos, workers=1, window=None, on_prepared=None,
+                         memory_budget=MEMORY_BUDGET_BYTES, scratch_dir=None, cache=None,
+                         profile=DEFAULT_PROFILE):
+    """
+    Yields (index, photo, jpeg_bytes) for each (path, timestamp, coords) record,
+    strictly in photolog order. `photos` may be any iterable; it is pulled lazily.
+
+    - workers <= 1 runs compress_image inline (the serial path)
+    - otherwise compress_image fans out to a process pool, with at most `window`
+      photos in flight so memory stays flat on big jobs
+    - finished photos waiting for the canvas go through a PreparedImageSpool
+    - cache (a DerivativeCache) lets unchanged photos skip decoding entirely
+    - profile picks the OUTPUT_PROFILES size and quality of the prepared JPEGs
+    - on_prepared(index) fires as each photo finishes, in completion order
+    """
+    if workers <= 1:
+        for idx, photo in enumerate(photos):
+            jpeg_bytes = compress_image(photo[0], profile, cache=cache)
+            if on_prepared:
+                on_prepared(idx)
+            yield idx, photo, jpeg_bytes
+        return
+
+    window = max(1, window or workers * PREPARE_WINDOW_PER_WORKER)
+    source = enumerate(photos)
+    exhausted = False
+    spool = PreparedImageSpool(memory_budget, scratch_dir)
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()  # [index, photo, future, spooled] in photolog order
+    running = {}  # future -> pending entry, until it finishes
+    try:
+        while True:
+            while not exhausted and len(pending) < window:
+                try:
+                    idx, photo = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                # Tracing workers send their spans back alongside the image
+                task = compress_image_traced if TRACER else compress_image
+                fut = pool.submit(task, photo[0], profile, cache=cache)
+                entry = [idx, photo, fut, None]
+                pending.append(entry)
+                running[fut] = entry
+
+            if not pending:
+                break
+
+            head = pending[0]
+            while True:
+                for fut in [f for f in running if f.done()]:
+                    entry = running.pop(fut)
+                    result = fut.result()
+                    if TRACER and isinstance(result, tuple):
+                        result, spans = result
+                        TRACER.merge(spans)
+                    entry[3] = spool.put(result)
+                    entry[2] = None
+                    if on_prepared:
+                        on_prepared(entry[0])
+                if head[2] is None:
+                    break
+                wait(running, return_when=FIRST_COMPLETED)
+
+            pending.popleft()
+            yield head[0], head[1], spool.take(head[3])
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        spool.close()
+
+
+# ----------------- PROGRESS -----------------
+class ProgressChannel:
+    """
+    Thread-safe progress feed for one photolog run.
+
+    The generator post()s small events from its own thread; whoever shows the
+    progress calls drain() at its own pace (the app once per PROGRESS_FRAME_MS,
+    the CLI once per CLI_PROGRESS_INTERVAL), which folds everything queued since
+    the last call into the running totals. Nothing here touches Tk.
+
+    Stages: 'prepared' and 'placed' (per photo, with its index), 'saved' (a
+    volume, with its size in bytes), then 'done' or 'failed'.
+    """
+    def __init__(self, total=None, events=None):
+        # (stage, index, nbytes); render_photolog_part posts into a multiprocessing.Manager queue instead
+        self.events = events if events is not None else queue.SimpleQueue()
+        self.total = total  # photos in the run; create_photolog fills it in if unknown
+        self.started = time.monotonic()
+        self.prepared = 0
+        self.placed = 0
+        self.bytes_written = 0
+        self.stage = None
+        self.done = False
+        self.failed = False
+
+    def post(self, stage, index=None, nbytes=0):
+        self.events.put((stage, index, nbytes))
+
+    def drain(self):
+        """Applies every queued event to the totals; returns how many there were."""
+        count = 0
+        while True:
+            try:
+                stage, _index, nbytes = self.events.get_nowait()
+            except queue.Empty:
+                return count
+            count += 1
+            self.stage = stage
+            if stage == "prepared":
+                self.prepared += 1
+            elif stage == "placed":
+                self.placed += 1
+            elif stage == "saved":
+                self.bytes_written += nbytes
+            elif stage == "done":
+                self.done = True
+            elif stage == "failed":
+                self.failed = True
+
+    @property
+    def finished(self):
+        return self.done or self.failed
+
+    def percent(self):
+        if self.done:
+            return 100.0
+        if not self.total:
+            return 0.0
+        # Each photo counts once when prepared and once when placed, plus the final save
+        return min((self.prepared + self.placed) / (self.total * 2 + 1) * 100, 100.0)
+
+    def photos_per_second(self):
+        elapsed = time.monotonic() - self.started
+        return (self.prepared + self.placed) / 2 / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        """Seconds left at the current rate, or None before there's a rate to go on."""
+        rate = self.photos_per_second()
+        if not self.total or not rate or self.finished:
+            return None
+        return max(0.0, (self.total * 2 - self.prepared - self.placed) / 2 / rate)
+
+    def summary(self):
+        text = f"{int(self.percent())}%"
+        if self.finished:
+            return text
+        rate = self.photos_per_second()
+        if rate:
+            text += f" ({rate:.1f} photos/s"
+            eta = self.eta()
+            if eta is not None:
+                minutes, seconds = divmod(int(eta + 0.5), 60)
+                text += f", about {minutes}:{seconds:02d} left"
+            text += ")"
+        return text
 
 
 # ----------------- PDF CREATION (UNCHANGED LAYOUT) -----------------
-def create_photolog(photos, output_path, logo_path, progress_callback):
+def load_logo(logo_path, box_size):
+    """Decodes the logo once, downscaled to LOGO_DPI at the size it prints."""
+    from reportlab.lib.utils import ImageReader
+
+    img = open_image_for_pillow(logo_path)
+    if img.mode not in ('L', 'RGB', 'CMYK'):
+        # Same flattening ReportLab applies when it embeds the image
+        img = img.convert('RGB')
+    max_px = (math.ceil(box_size[0] / INCH * LOGO_DPI), math.ceil(box_size[1] / INCH * LOGO_DPI))
+    img.thumbnail(max_px, Image.Resampling.LANCZOS)
+    return ImageReader(img)
+
+
+def define_page_forms(c, logo):
+    """
+    Draws the static parts of every page once as form XObjects:
+
+    - PAGE_HEADER_FORM: logo + "SITE PHOTOGRAPHS", placed as-is on each page
+    - NOTES_BOX_FORM: the notes box and its two rules, placed at each photo's box origin
+
+    `logo` is the ImageReader from load_logo, so volumes can share one decode.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    width, height = letter
+
+    c.beginForm(PAGE_HEADER_FORM)
+    c.setFont("Helvetica-Bold", 12)
+    text_width = stringWidth("SITE PHOTOGRAPHS", "Helvetica-Bold", 12)
+    c.drawString(width - MARGIN - text_width, height - MARGIN - 0.25*INCH, "SITE PHOTOGRAPHS")
+    c.drawImage(logo, MARGIN, height - MARGIN - 0.4*INCH,
+                width=LOGO_BOX[0], height=LOGO_BOX[1],
+                preserveAspectRatio=True)
+    c.endForm()
+
+    # BBox padded by a point so the box outline isn't clipped
+    c.beginForm(NOTES_BOX_FORM, -1, -1, PHOTO_WIDTH + 1, BOX_HEIGHT + 1)
+    c.setStrokeColor(colors.black)
+    c.setFillColor(colors.white)
+    c.rect(0, 0, PHOTO_WIDTH, BOX_HEIGHT, fill=1)
+    c.line(10, 28, PHOTO_WIDTH - 10, 28)
+    c.line(10, 8, PHOTO_WIDTH - 10, 8)
+    c.endForm()
+
+
+def set_note_field_defaults(c):
+    """
+    Sets up what the "shared" and "single" widgets inherit instead of carrying:
+
+    - the note font and colour in the AcroForm's default appearance (/DA), with
+      Helvetica in its default resources (/DR) and nowhere else
+    - NOTE_FIELD_APPEARANCE, one empty appearance stream (no resources) that
+      every one of those widgets points its /AP /N at; a viewer stretches it
+      to each widget's Rect and draws text from /DA once something is typed
+    """
+    from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFName, PDFStream, PDFString
+
+    form = c.acroForm
+    form.makeFont("Helvetica")
+    form.extras["DA"] = PDFString("/%s %d Tf 0 g" % NOTE_FONT)
+    appearance = PDFStream(PDFDictionary({
+        "Type": PDFName("XObject"),
+        "Subtype": PDFName("Form"),
+        "BBox": PDFArray([0, 0, PHOTO_WIDTH - 20, 15]),
+    }), "/Tx BMC EMC")
+    c._doc.Reference(appearance, NOTE_FIELD_APPEARANCE)
+
+
+def draw_photo_slot(c, slot, photo_num, jpeg_bytes, coords, fields=DEFAULT_FIELDS):
+    """
+    Draws photo `photo_num`, its label and note fields into slot 0 (top) or 1 (bottom).
+    `fields` is the FIELD_STRATEGIES entry for the notes box.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    width, height = letter
+    form = c.acroForm
+
+    page_center = width / 2
+    photo_x = page_center - (PHOTO_WIDTH / 2)
+
+    y_pos = height - 1.0*INCH - slot * (PHOTO_HEIGHT + BOX_HEIGHT + 0.4*INCH)
+
+    with trace("draw_image", bytes_in=len(jpeg_bytes)):
+        c.drawImage(JpegImage(jpeg_bytes), photo_x, y_pos - PHOTO_HEIGHT,
+                    PHOTO_WIDTH, PHOTO_HEIGHT)
+
+    box_y = y_pos - PHOTO_HEIGHT - BOX_HEIGHT
+    c.saveState()
+    c.translate(photo_x, box_y)
+    c.doForm(NOTES_BOX_FORM)
+    c.restoreState()
+
+    c.setFont("Helvetica-Bold", 10)
+    c.setFillColor(colors.black)
+    photo_label = f"Photo {photo_num}"
+    c.drawString(photo_x + 10, y_pos - PHOTO_HEIGHT - 20, photo_label)
+
+    if coords:
+        c.setFont("Helvetica", 10)
+        coord_text = f"({coords})"
+        coord_width = stringWidth(coord_text, "Helvetica", 10)
+        c.drawString(photo_x + PHOTO_WIDTH - coord_width - 10, y_pos - PHOTO_HEIGHT - 20, coord_text)
+
+    if fields == "print":
+        return
+    with trace("form_fields"):
+        if fields != "standard":
+            add_light_note_fields(c, photo_num, photo_x, box_y, fields)
+            return
+        form.textfield(
+            name=f"notes_photo_{photo_num}_1",
+            x=photo_x + 10,
+            y=box_y + 30,
+            width=PHOTO_WIDTH - 20,
+            height=15,
+            fontName="Helvetica",
+            fontSize=9,
+            borderStyle="solid",
+            borderWidth=0,
+            borderColor=colors.black,
+            fillColor=colors.white
+        )
+        form.textfield(
+            name=f"notes_photo_{photo_num}_2",
+            x=photo_x + 10,
+            y=box_y + 10,
+            width=PHOTO_WIDTH - 20,
+            height=15,
+            fontName="Helvetica",
+            fontSize=9,
+            borderStyle="solid",
+            borderWidth=0,
+            borderColor=colors.black,
+            fillColor=colors.white
+        )
+
+
+def add_light_note_fields(c, photo_num, photo_x, box_y, fields):
+    """
+    The "shared" and "single" note fields. ReportLab's textfield() writes an
+    appearance stream (with its own font resources) per widget, so these
+    widget dictionaries are built here instead: no font, colour or background
+    of their own, and /AP /N pointing at the NOTE_FIELD_APPEARANCE stream from
+    set_note_field_defaults. The notes box underneath is white already.
+
+    "shared" keeps the standard two lines and their names; "single" is one
+    multi-line field, notes_photo_N, over both rules.
+    """
+    from reportlab.pdfbase.acroform import fieldFlagValues
+    from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFName, PDFObjectReference, PDFString
+
+    form = c.acroForm
+    doc = c._doc
+    x = photo_x + 10
+    width = PHOTO_WIDTH - 20
+
+    def add_field(name, y, height, flags=0, maxlen=100):
+        widget = PDFDictionary({
+            "Type": PDFName("Annot"),
+            "Subtype": PDFName("Widget"),
+            "FT": PDFName("Tx"),
+            "T": PDFString(name),
+            "V": PDFString(""),
+            "Ff": flags,
+            "F": 4,  # print
+            "MaxLen": maxlen,
+            "P": doc.thisPageRef(),
+            "Rect": PDFArray([x, y, x + width, y + height]),
+            "AP": PDFDictionary({"N": PDFObjectReference(NOTE_FIELD_APPEARANCE)}),
+        })
+        c._addAnnotation(widget)
+        form.fields.append(form.getRef(widget))
+
+    if fields == "single":
+        add_field(f"notes_photo_{photo_num}", box_y + 10, 35, flags=fieldFlagValues["multiline"], maxlen=200)
+        return
+    add_field(f"notes_photo_{photo_num}_1", box_y + 30, 15)
+    add_field(f"notes_photo_{photo_num}_2", box_y + 10, 15)
+
+
+def volume_filename(volume):
+    """photolog.pdf, then photolog_part2.pdf, photolog_part3.pdf, ..."""
+    return "photolog.pdf" if volume == 1 else f"photolog_part{volume}.pdf"
+
+
+def stream_photolog(photos, output_path, logo_path, progress=None, workers=1,
+                    memory_budget=MEMORY_BUDGET_BYTES, scratch_dir=None, cache=None,
+                    max_pages=None, max_bytes=None, profile=DEFAULT_PROFILE, first_number=1,
+                    fields=DEFAULT_FIELDS, trim_cache=True):
+    """
+    Streaming photolog writer. `photos` is any iterable of (path, timestamp, coords)
+    records and is consumed lazily; returns the list of PDFs written.
+
+    ReportLab keeps a document in memory until it is saved, so with max_pages
+    and/or max_bytes (estimated from the embedded image bytes) the output rolls
+    over to photolog_part2.pdf, photolog_part3.pdf, ... and memory stays bounded
+    by one volume. Photo numbers and note field names continue across volumes.
+
+    `progress` is an optional ProgressChannel; events are posted from this thread.
+    `profile` names the OUTPUT_PROFILES entry the photos are prepared for and
+    `fields` the FIELD_STRATEGIES entry for the note fields.
+    `first_number` is the first photo's "Photo N" number; sharded rendering
+    starts later page ranges with it (always odd, so a range starts a page).
+    trim_cache=False leaves trimming `cache` to the caller (sharded parts,
+    which would otherwise all trim it at once).
+    """
+    from reportlab import rl_config
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
     if not os.path.exists(output_path):
         os.makedirs(output_path)
     if not os.path.exists(logo_path):
         raise FileNotFoundError(f"Logo file not found: {logo_path}")
-    
-    output_pdf = os.path.join(output_path, "photolog.pdf")
+
+    logo = load_logo(logo_path, LOGO_BOX)
+
+    def post(stage, index=None, nbytes=0):
+        if progress:
+            progress.post(stage, index, nbytes)
+
+    written = []
+    c = None
+    volume = 0
+    volume_pages = 0
+    volume_bytes = 0
+
+    def start_volume():
+        nonlocal c, volume, volume_pages, volume_bytes
+        volume += 1
+        volume_pages = 0
+        volume_bytes = 0
+        c = canvas.Canvas(os.path.join(output_path, volume_filename(volume)), pagesize=letter,
+                          pageCompression=1)
+        define_page_forms(c, logo)
+        if fields in ("shared", "single"):
+            set_note_field_defaults(c)
+
+    def finish_volume():
+        path = os.path.join(output_path, volume_filename(volume))
+        with trace("save") as span:
+            c.save()
+            span.record(bytes_out=os.path.getsize(path))
+        written.append(path)
+        post("saved", volume, os.path.getsize(path))
+
+    # ReportLab's default ASCII85 layer keeps a PDF 7-bit clean at the cost of
+    # a quarter more bytes in every stream; photologs are binary files anyway.
+    # It's a process-wide setting, so it only holds while the canvases write.
+    use_a85 = rl_config.useA85
+    rl_config.useA85 = 0
+    try:
+        offset = first_number - 1
+        prepared = iter_prepared_photos(photos, workers, on_prepared=lambda idx: post("prepared", offset + idx),
+                                        memory_budget=memory_budget, scratch_dir=scratch_dir, cache=cache,
+                                        profile=profile)
+        with closing(prepared):
+            for idx, photo, jpeg_bytes in prepared:
+                slot = idx % 2
+                if slot == 0:
+                    if c is not None:
+                        c.showPage()
+                        volume_pages += 1
+                        if ((max_pages and volume_pages >= max_pages) or
+                                (max_bytes and volume_bytes >= max_bytes)):
+                            finish_volume()
+                            c = None
+                    if c is None:
+                        start_volume()
+                    c.doForm(PAGE_HEADER_FORM)
+
+                _, _, coords = photo
+                with trace("place", photo[0]):
+                    draw_photo_slot(c, slot, first_number + idx, jpeg_bytes, coords, fields)
+                volume_bytes += len(jpeg_bytes) * IMAGE_STREAM_OVERHEAD + PHOTO_PAGE_OVERHEAD_BYTES
+                post("placed", offset + idx)
+
+        if c is None:
+            raise ValueError("No photos provided")
+        c.showPage()
+        finish_volume()
+    finally:
+        rl_config.useA85 = use_a85
+    if cache and trim_cache:
+        cache.trim()
+    post("done")
+    return written
+
+
+def create_photolog(photos, output_path, logo_path, progress=None, workers=1,
+                    memory_budget=MEMORY_BUDGET_BYTES, scratch_dir=None, cache=None,
+                    max_pages=None, max_bytes=None, profile=DEFAULT_PROFILE, sharded=False,
+                    fields=DEFAULT_FIELDS, optimize=False, linearize=False):
+    """
+    Writes photolog.pdf (plus photolog_partN.pdf volumes when max_pages/max_bytes
+    is set) into output_path and returns the paths written.
+
+    workers > 1 prepares photos in a process pool while the canvas places them
+    in order; the PDF is the same as the serial (workers=1) path. Prepared images
+    never touch the photo folder; past memory_budget they spill to scratch_dir
+    (default: the system temp dir). Passing a DerivativeCache reuses PDF images
+    from earlier runs. Progress goes to an optional ProgressChannel. `profile`
+    (draft / email / print) sets the resolution and JPEG quality of the photos;
+    `fields` (standard / shared / single / print) the note fields under them.
+
+    sharded=True with workers > 1 lays pages out in the workers too and merges
+    the parts (render_sharded_photolog; needs pypdf, and splits volumes by
+    max_pages only).
+
+    optimize=True runs each finished PDF through optimize_photolog (needs
+    pikepdf); linearize=True implies it and also linearizes them.
+    """
     if not photos:
         raise ValueError("No photos provided")
-    
-    c = canvas.Canvas(output_pdf, pagesize=letter)
-    form = c.acroForm
-    width, height = letter
-    
-    total_steps = len(photos) + 2
-    current_step = 0
-    
-    for i in range(0, len(photos), 2):
-        c.setFont("Helvetica-Bold", 12)
-        text_width = stringWidth("SITE PHOTOGRAPHS", "Helvetica-Bold", 12)
-        c.drawString(width - MARGIN - text_width, height - MARGIN - 0.25*INCH, "SITE PHOTOGRAPHS")
-        
-        if os.path.exists(logo_path):
-            logo = ImageReader(logo_path)
-            c.drawImage(logo, MARGIN, height - MARGIN - 0.4*INCH,
-                       width=1.25*INCH, height=0.625*INCH,
-                       preserveAspectRatio=True)
-        
-        current_step += 1
-        progress_callback(current_step / total_steps * 100)
-        
-        page_center = width / 2
-        photo_x = page_center - (PHOTO_WIDTH / 2)
-        
-        y_pos = height - 1.0*INCH
-        
-        for j in range(2):
-            if i + j >= len(photos):
+    if fields not in FIELD_STRATEGIES:
+        raise ValueError(f"Unknown note field strategy: {fields}")
+    if progress and progress.total is None:
+        progress.total = len(photos)
+    if sharded and workers > 1:
+        if max_bytes:
+            raise ValueError("Sharded rendering splits volumes by page count only; use max_pages")
+        written = render_sharded_photolog(photos, output_path, logo_path, progress, workers=workers,
+                                          scratch_dir=scratch_dir, cache=cache, max_pages=max_pages,
+                                          profile=profile, fields=fields)
+    else:
+        written = stream_photolog(photos, output_path, logo_path, progress, workers=workers,
+                                  memory_budget=memory_budget, scratch_dir=scratch_dir, cache=cache,
+                                  max_pages=max_pages, max_bytes=max_bytes, profile=profile, fields=fields)
+    if optimize or linearize:
+        for path in written:
+            optimize_photolog(path, linearize=linearize)
+    return written
+
+
+# ----------------- SHARDED RENDERING -----------------
+def shard_ranges(first, count, workers):
+    """
+    Splits photos [first, first + count) into contiguous (start, stop) ranges:
+    at least one per worker, at most SHARD_MAX_PHOTOS each, and whole pages
+    (an even number of photos) in all but the last.
+    """
+    parts = max(workers, math.ceil(count / SHARD_MAX_PHOTOS))
+    per_part = max(1, math.ceil(math.ceil(count / 2) / parts)) * 2
+    return [(start, min(start + per_part, first + count)) for start in range(first, first + count, per_part)]
+
+
+def render_photolog_part(part):
+    """
+    Pool worker for sharded rendering: lays out one page range with
+    stream_photolog and returns the PDF's path, or (path, spans) when tracing.
+
+    `part` is a dict (so it pickles into the worker) with photos, first_number,
+    output_path, logo_path, cache, profile, fields, trace, and events: the queue its
+    progress is relayed through, or None.
+    """
+    global TRACER
+    if part["trace"]:
+        TRACER = Tracer()
+    try:
+        progress = ProgressChannel(events=part["events"]) if part["events"] is not None else None
+        path, = stream_photolog(part["photos"], part["output_path"], part["logo_path"], progress,
+                                cache=part["cache"], profile=part["profile"],
+                                first_number=part["first_number"], fields=part["fields"], trim_cache=False)
+        return (path, TRACER.spans) if part["trace"] else path
+    finally:
+        TRACER = None
+
+
+def render_sharded_photolog(photos, output_path, logo_path, progress=None, workers=2,
+                            scratch_dir=None, cache=None, max_pages=None, profile=DEFAULT_PROFILE,
+                            fields=DEFAULT_FIELDS):
+    """
+    Sharded photolog writer: the photo list is cut into page ranges that are
+    laid out in parallel by render_photolog_part, then each volume's parts are
+    merged in order with pypdf, which also joins their note fields into one
+    AcroForm and keeps one copy of anything the parts have in common. Photo
+    numbers and field names are global, so the pages match stream_photolog's.
+
+    Parts wait in a temporary folder under scratch_dir (default: the system
+    temp dir); volumes split on max_pages only. Returns the list of PDFs written.
+    """
+    try:
+        from pypdf import PdfWriter
+    except ImportError as e:
+        raise RuntimeError("Sharded rendering needs pypdf. Install it with: pip install pypdf") from e
+
+    if not os.path.exists(logo_path):
+        raise FileNotFoundError(f"Logo file not found: {logo_path}")
+    os.makedirs(output_path, exist_ok=True)
+
+    photos = list(photos)
+    per_volume = max_pages * 2 if max_pages else len(photos)
+    volumes = [shard_ranges(first, min(per_volume, len(photos) - first), workers)
+               for first in range(0, len(photos), per_volume)]
+
+    # Workers can't reach an in-process ProgressChannel; their events come back through a manager queue
+    manager = multiprocessing.Manager() if progress else None
+    events = manager.Queue() if manager else None
+
+    def relay_progress():
+        while events is not None:
+            try:
+                stage, index, nbytes = events.get_nowait()
+            except queue.Empty:
+                return
+            if stage in ("prepared", "placed"):  # 'saved' and 'done' belong to the merged volumes
+                progress.post(stage, index, nbytes)
+
+    written = []
+    parts_dir = tempfile.mkdtemp(prefix="photolog_parts_", dir=scratch_dir)
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            [pool.submit(render_photolog_part, {
+                "photos": photos[start:stop],
+                "first_number": start + 1,
+                "output_path": os.path.join(parts_dir, f"{start + 1:06d}"),
+                "logo_path": logo_path,
+                "cache": cache,
+                "profile": profile,
+                "fields": fields,
+                "trace": TRACER is not None,
+                "events": events,
+            }) for start, stop in ranges]
+            for ranges in volumes
+        ]
+        # Later volumes keep rendering while earlier ones are merged
+        for volume, parts in enumerate(futures, 1):
+            pending = set(parts)
+            while pending:
+                _, pending = wait(pending, timeout=SHARD_POLL_INTERVAL)
+                relay_progress()
+            part_paths = []
+            for fut in parts:
+                result = fut.result()
+                if isinstance(result, tuple):
+                    result, spans = result
+                    TRACER.merge(spans)
+                part_paths.append(result)
+
+            path = os.path.join(output_path, volume_filename(volume))
+            with trace("merge") as span:
+                writer = PdfWriter()
+                for part_path in part_paths:
+                    writer.append(part_path)
+                # Every part carries its own header form, logo, fonts and field
+                # appearance, and a photo placed in two parts is embedded twice
+                writer.compress_identical_objects()
+                writer.write(path)
+                span.record(bytes_out=os.path.getsize(path))
+            written.append(path)
+            for part_path in part_paths:
+                os.remove(part_path)
+            if progress:
+                progress.post("saved", volume, os.path.getsize(path))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        if manager:
+            manager.shutdown()
+    if cache:
+        cache.trim()  # once, here: the parts leave it alone
+    if progress:
+        progress.post("done")
+    return written
+
+
+# ----------------- OUTPUT OPTIMIZER -----------------
+def image_xobject_key(image):
+    """Content hash of an image XObject: its encoded bytes plus the dictionary that says how to decode them."""
+    return hashlib.sha1(image.read_raw_bytes()).hexdigest(), image.stream_dict.unparse()
+
+
+def dedupe_pdf_images(pdf):
+    """
+    Points every reference to an image XObject at the first image with the
+    same content (image_xobject_key), on pages and in the form XObjects they
+    use. The copies become unreachable and aren't written. Returns how many
+    images were dropped.
+    """
+    import pikepdf
+
+    first = {}
+    dropped = set()
+    visited = set()
+
+    def walk(resources):
+        xobjects = resources.get("/XObject") if resources is not None else None
+        if xobjects is None:
+            return
+        for name in list(xobjects.keys()):
+            xobj = xobjects[name]
+            subtype = xobj.get("/Subtype")
+            if subtype == pikepdf.Name.Image:
+                keep = first.setdefault(image_xobject_key(xobj), xobj)
+                if keep.objgen != xobj.objgen:
+                    xobjects[name] = keep
+                    dropped.add(xobj.objgen)
+            elif subtype == pikepdf.Name.Form and xobj.objgen not in visited:
+                visited.add(xobj.objgen)
+                walk(xobj.get("/Resources"))
+
+    for page in pdf.pages:
+        walk(page.obj.get("/Resources"))
+    return len(dropped)
+
+
+def optimize_photolog(path, linearize=False):
+    """
+    Rewrites a finished photolog in place, smaller: duplicate images are merged
+    (dedupe_pdf_images), any uncompressed stream is compressed, and the other
+    objects are packed into object streams with a cross-reference stream.
+    linearize=True also linearizes it ("fast web view"), so a viewer reading
+    the file off a network share can show the first page before the rest has
+    arrived.
+
+    Needs pikepdf. Returns the file's (bytes before, bytes after).
+    """
+    try:
+        import pikepdf
+    except ImportError as e:
+        raise RuntimeError("Optimizing PDFs needs pikepdf. Install it with: pip install pikepdf") from e
+
+    before = os.path.getsize(path)
+    tmp_path = path + ".tmp"  # the original stays whole until the rewrite is complete
+    with trace("optimize", bytes_in=before) as span:
+        try:
+            with pikepdf.open(path) as pdf:
+                dedupe_pdf_images(pdf)
+                pdf.save(tmp_path, compress_streams=True,
+                         object_stream_mode=pikepdf.ObjectStreamMode.generate, linearize=linearize)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        after = os.path.getsize(path)
+        span.record(bytes_out=after)
+    return before, after
+
+
+# ----------------- RENAME -----------------
+class PhotoRenameError(OSError):
+    """The photos can't be renamed safely; nothing was moved."""
+
+
+def plan_photo_renames(names, targets, existing):
+    """
+    Orders the moves that give file names[i] the name targets[i], all in one folder.
+
+    Files already named right stay put. A move waits until the file holding its
+    target name has moved on, and each cycle (A -> B -> A) goes through one
+    temporary name. `existing` is every name in the folder; a target held by a
+    file that isn't being renamed raises PhotoRenameError rather than overwriting
+    it. Returns [(src, dst)] for os.replace, in order.
+
+    Names are compared case-insensitively, as Windows and macOS do.
+    """
+    fold = str.casefold
+    moving = [i for i in range(len(names)) if names[i] != targets[i]]
+    holders = {fold(names[i]): i for i in moving}
+    outsiders = {fold(name) for name in set(existing) - set(names)}
+    clashes = [targets[i] for i in moving if fold(targets[i]) in outsiders]
+    if clashes:
+        raise PhotoRenameError(
+            "Renaming would overwrite files that aren't in this photolog: "
+            f"{', '.join(clashes[:3])}{', ...' if len(clashes) > 3 else ''}"
+        )
+
+    blocked = set()
+    next_move = {}  # i -> the move whose target is names[i], free once i has moved
+    for i in moving:
+        j = holders.get(fold(targets[i]))
+        if j is not None and j != i:
+            blocked.add(i)
+            next_move[j] = i
+
+    steps = []
+    done = set()
+
+    def follow(i):
+        while i is not None and i not in done:
+            steps.append((names[i], targets[i]))
+            done.add(i)
+            i = next_move.get(i)
+
+    for i in moving:
+        if i not in blocked:
+            follow(i)
+
+    # Everything left is a cycle: park one file, rotate the rest, then unpark it
+    taken = {fold(name) for name in existing} | {fold(target) for target in targets}
+    for i in moving:
+        if i in done:
+            continue
+        n = 0
+        while True:
+            temp = f".photolog-swap-{n}{os.path.splitext(names[i])[1]}"
+            if fold(temp) not in taken:
                 break
-                
-            photo_path, _, coords = photos[i + j]
-            
-            compressed_path = compress_image(photo_path)
-            c.drawImage(compressed_path, photo_x, y_pos - PHOTO_HEIGHT, 
-                       PHOTO_WIDTH, PHOTO_HEIGHT)
-            os.remove(compressed_path)
-            
-            c.setStrokeColor(colors.black)
-            c.setFillColor(colors.white)
-            box_y = y_pos - PHOTO_HEIGHT - BOX_HEIGHT
-            c.rect(photo_x, box_y, PHOTO_WIDTH, BOX_HEIGHT, fill=1)
-            
-            c.setFont("Helvetica-Bold", 10)
-            c.setFillColor(colors.black)
-            photo_num = i + j + 1
-            photo_label = f"Photo {photo_num}"
-            c.drawString(photo_x + 10, y_pos - PHOTO_HEIGHT - 20, photo_label)
-            
-            if coords:
-                c.setFont("Helvetica", 10)
-                coord_text = f"({coords})"
-                coord_width = stringWidth(coord_text, "Helvetica", 10)
-                c.drawString(photo_x + PHOTO_WIDTH - coord_width - 10, y_pos - PHOTO_HEIGHT - 20, coord_text)
-            
-            form.textfield(
-                name=f"notes_photo_{photo_num}_1",
-                x=photo_x + 10, 
-                y=box_y + 30,
-                width=PHOTO_WIDTH - 20,
-                height=15,
-                fontName="Helvetica",
-                fontSize=9,
-                borderStyle="solid",
-                borderWidth=0,
-                borderColor=colors.black,
-                fillColor=colors.white
-            )
-            form.textfield(
-                name=f"notes_photo_{photo_num}_2",
-                x=photo_x + 10, 
-                y=box_y + 10,
-                width=PHOTO_WIDTH - 20,
-                height=15,
-                fontName="Helvetica",
-                fontSize=9,
-                borderStyle="solid",
-                borderWidth=0,
-                borderColor=colors.black,
-                fillColor=colors.white
-            )
-            
-            c.setStrokeColor(colors.black)
-            c.line(photo_x + 10, box_y + 28, photo_x + PHOTO_WIDTH - 10, box_y + 28)
-            c.line(photo_x + 10, box_y + 8, photo_x + PHOTO_WIDTH - 10, box_y + 8)
-            
-            y_pos -= (PHOTO_HEIGHT + BOX_HEIGHT + 0.4*INCH)
-            current_step += 1
-            progress_callback(current_step / total_steps * 100)
-        
-        c.showPage()
-    
-    c.save()
-    progress_callback(100)
+            n += 1
+        taken.add(fold(temp))
+        steps.append((names[i], temp))
+        done.add(i)
+        follow(next_move[i])
+        steps.append((temp, targets[i]))
+    return steps
+
+
+def apply_rename_steps(photo_folder, steps, start=0):
+    """
+    Runs steps[start:] with os.replace, marking each one done in the journal.
+
+    If a move fails, every step before it is undone (so the folder is back to
+    its original names) and the error re-raised. The journal is removed once
+    the folder is consistent again; it's only left behind if the undo fails too.
+    """
+    journal_path = os.path.join(photo_folder, RENAME_JOURNAL)
+    with open(journal_path, 'a', encoding='utf-8') as journal:
+        for k in range(start, len(steps)):
+            src, dst = steps[k]
+            try:
+                os.replace(os.path.join(photo_folder, src), os.path.join(photo_folder, dst))
+            except OSError:
+                journal.close()
+                undo_rename_steps(photo_folder, steps, k)
+                raise
+            journal.write(json.dumps({"done": k}) + "\n")
+            journal.flush()
+    os.remove(journal_path)
+
+
+def undo_rename_steps(photo_folder, steps, count):
+    """Reverses the first `count` steps, newest first, and drops the journal."""
+    for src, dst in reversed(steps[:count]):
+        os.replace(os.path.join(photo_folder, dst), os.path.join(photo_folder, src))
+    os.remove(os.path.join(photo_folder, RENAME_JOURNAL))
+
+
+def resume_photo_rename(photo_folder, undo=False):
+    """
+    Finishes a rename_to_photo_numbers run that was interrupted, or with
+    undo=True puts the original names back, from the journal it left in
+    photo_folder. Returns False when there was nothing to resume.
+    """
+    journal_path = os.path.join(photo_folder, RENAME_JOURNAL)
+    try:
+        with open(journal_path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return False
+    try:
+        steps = [tuple(step) for step in json.loads(lines[0])["steps"]]
+    except (IndexError, ValueError, KeyError):
+        # The plan never made it to disk, so no file was moved either
+        os.remove(journal_path)
+        return True
+
+    done = 0
+    for line in lines[1:]:
+        try:
+            done = json.loads(line)["done"] + 1
+        except (ValueError, KeyError):
+            break  # torn last line
+    # The move after the last marker may have happened without its marker being written
+    if done < len(steps):
+        src, dst = steps[done]
+        if not os.path.exists(os.path.join(photo_folder, src)) and os.path.exists(os.path.join(photo_folder, dst)):
+            done += 1
+
+    if undo:
+        undo_rename_steps(photo_folder, steps, done)
+    else:
+        apply_rename_steps(photo_folder, steps, done)
+    return True
+
+
+def rename_to_photo_numbers(photos, index=None):
+    """
+    Renames each photo to "Photo N" (keeping its extension) in list order and
+    returns the updated (path, timestamp, coords) list. A MetadataIndex, if
+    given, follows the renames.
+
+    Only photos whose name changes are moved, with one os.replace each (plus
+    one per cycle of names, see plan_photo_renames). The plan is journaled in
+    the folder first: a failed move rolls the whole rename back, and an
+    interrupted one can be finished or undone with resume_photo_rename.
+    """
+    if not photos:
+        return []
+    photo_folder = os.path.dirname(photos[0][0])
+    if os.path.exists(os.path.join(photo_folder, RENAME_JOURNAL)):
+        raise PhotoRenameError(f"An earlier rename in {photo_folder} was interrupted; finish or undo it first")
+
+    names = [os.path.basename(path) for path, _, _ in photos]
+    targets = [f"Photo {idx + 1}{os.path.splitext(name)[1]}" for idx, name in enumerate(names)]
+    steps = plan_photo_renames(names, targets, os.listdir(photo_folder))
+    if steps:
+        # The plan is on disk before the first file moves
+        with open(os.path.join(photo_folder, RENAME_JOURNAL), 'w', encoding='utf-8') as journal:
+            journal.write(json.dumps({"steps": steps}) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        apply_rename_steps(photo_folder, steps)
+
+    new_photos = [(os.path.join(photo_folder, target), ts, coords)
+                  for target, (_, ts, coords) in zip(targets, photos)]
+    if index is not None and steps:
+        renames = {name: target for name, target in zip(names, targets) if name != target}
+        try:
+            index.rename(photo_folder, renames)
+        except sqlite3.Error as e:
+            print(f"Metadata index update failed: {e}")
+    return new_photos
+
+
+# ----------------- HEADLESS / BATCH -----------------
+def scan_photo_folder(photo_folder, index=None):
+    """
+    Returns [(path, timestamp, coords)] in name order, reading metadata on a
+    thread pool and reusing/updating a MetadataIndex when one is given.
+    """
+    entries = sorted(list_photos(photo_folder), key=lambda e: e.name.lower())
+    known = index.lookup(photo_folder) if index else {}
+
+    stats = {}
+    photos = []
+    for entry in entries:
+        st = entry.stat()
+        stats[entry.path] = (st.st_size, st.st_mtime_ns)
+        cached = known.get(entry.name)
+        if cached and cached[:2] == stats[entry.path]:
+            photos.append((entry.path, cached[2], cached[3]))
+        else:
+            photos.append((entry.path, None, None))
+
+    to_scan = [path for path, timestamp, _ in photos if timestamp is None]
+    if to_scan:
+        scanner = MetadataScanner(to_scan)
+        try:
+            rows = []
+            for idx, (path, timestamp, _) in enumerate(photos):
+                if timestamp is None:
+                    timestamp, coords = scanner.result(path)
+                    photos[idx] = (path, timestamp, coords)
+                    rows.append((os.path.basename(path), *stats[path], timestamp, coords))
+        finally:
+            scanner.shutdown()
+        if index:
+            try:
+                index.store(photo_folder, rows)
+            except sqlite3.Error as e:
+                print(f"Metadata index update failed: {e}")
+    return photos
+
+
+def run_photolog_job(job):
+    """
+    One headless photolog: scan, sort, optionally rename, generate.
+
+    `job` is a dict (so it pickles into pool workers) with photo_folder,
+    output_path, logo_path, sort, rename, workers, use_cache, max_pages, max_bytes,
+    profile, sharded, fields, optimize, linearize, and optionally a ProgressChannel
+    under "progress" when run in-process. Returns the list of PDFs written.
+    """
+    photo_folder = job["photo_folder"]
+    if resume_photo_rename(photo_folder, undo=True):
+        print(f"{photo_folder}: undid an interrupted rename")
+    index = open_metadata_index()
+    photos = scan_photo_folder(photo_folder, index)
+    if not photos:
+        raise ValueError(f"No supported images found in {photo_folder}")
+
+    if job["sort"] == "timestamp":
+        photos.sort(key=lambda x: x[1])
+    elif job["sort"] == "saved" and index:
+        # The order/removals last saved from the preview window
+        order, removed = index.load_arrangement(photo_folder)
+        photos = [p for p in photos if os.path.basename(p[0]) not in removed] or photos
+        if order:
+            rank = {name: i for i, name in enumerate(order)}
+            photos.sort(key=lambda x: rank.get(os.path.basename(x[0]), len(rank)))
+
+    if job["rename"]:
+        photos = rename_to_photo_numbers(photos, index)
+
+    cache = open_derivative_cache() if job["use_cache"] else None
+    return create_photolog(photos, job["output_path"], job["logo_path"], job.get("progress"),
+                           workers=job["workers"], cache=cache,
+                           max_pages=job["max_pages"], max_bytes=job["max_bytes"],
+                           profile=job.get("profile", DEFAULT_PROFILE), sharded=job.get("sharded", False),
+                           fields=job.get("fields", DEFAULT_FIELDS), optimize=job.get("optimize", False),
+                           linearize=job.get("linearize", False))
+
+
+def expand_job_folders(sources, manifest=None):
+    """Photo folders from positional folders/globs plus an optional manifest (one per line, # comments)."""
+    folders = []
+    for source in sources:
+        matches = sorted(glob.glob(source)) if glob.has_magic(source) else [source]
+        folders.extend(m for m in matches if os.path.isdir(m))
+        if not glob.has_magic(source) and not os.path.isdir(source):
+            raise FileNotFoundError(f"Photo folder not found: {source}")
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                folder = os.path.join(base, os.path.expanduser(line))
+                if not os.path.isdir(folder):
+                    raise FileNotFoundError(f"Photo folder not found: {folder} (from {manifest})")
+                folders.append(folder)
+
+    # Same folder listed twice would race on its own output
+    seen = set()
+    unique = []
+    for folder in folders:
+        key = os.path.normcase(os.path.abspath(folder))
+        if key not in seen:
+            seen.add(key)
+            unique.append(folder)
+    return unique
+
+
+def job_output_paths(folders, output):
+    """Each job's output dir: the photo folder itself, `output` for a single job, or output/<folder name>."""
+    if output is None:
+        return list(folders)
+    if len(folders) == 1:
+        return [output]
+    paths = []
+    used = set()
+    for folder in folders:
+        name = os.path.basename(os.path.normpath(os.path.abspath(folder))) or "photolog"
+        candidate = name
+        n = 2
+        while candidate.lower() in used:
+            candidate = f"{name}_{n}"
+            n += 1
+        used.add(candidate.lower())
+        paths.append(os.path.join(output, candidate))
+    return paths
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="photolog",
+        description="Generate photolog PDFs without the GUI. Run with no arguments to open the app."
+    )
+    parser.add_argument("folders", nargs="*", metavar="FOLDER",
+                        help="photo folder(s); glob patterns like 'jobs/2024-*' are expanded")
+    parser.add_argument("--manifest", help="text file listing one photo folder per line")
+    parser.add_argument("--logo", required=True, help="logo image for the page header")
+    parser.add_argument("--output", help="output folder (default: write photolog.pdf into each photo folder); "
+                                         "with several jobs each gets output/<folder name>")
+    parser.add_argument("--sort", choices=("name", "timestamp", "saved"), default="name",
+                        help="photo order; 'saved' reuses the order last arranged in the preview window")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="processes to use: image preparation for one job, whole jobs for several")
+    parser.add_argument("--rename", action="store_true",
+                        help="rename the photos to 'Photo N' like the app does (default: leave them alone)")
+    parser.add_argument("--no-cache", action="store_true", help="don't read or write the derivative cache")
+    parser.add_argument("--profile", choices=list(OUTPUT_PROFILES), default=DEFAULT_PROFILE,
+                        help="photo resolution/quality in the PDF: " + ", ".join(
+                            f"{name} ({p['dpi']} dpi, q{p['quality']})" for name, p in OUTPUT_PROFILES.items()))
+    parser.add_argument("--fields", choices=list(FIELD_STRATEGIES), default=DEFAULT_FIELDS,
+                        help="note fields under each photo: " + "; ".join(
+                            f"{name}: {desc}" for name, desc in FIELD_STRATEGIES.items()))
+    parser.add_argument("--max-pages", type=int, help="split into photolog_partN.pdf volumes of this many pages")
+    parser.add_argument("--max-mb", type=float, help="split into volumes of about this many megabytes")
+    parser.add_argument("--sharded", action="store_true",
+                        help="lay out page ranges in parallel worker processes and merge them "
+                             "(big single jobs; needs pypdf; not with --max-mb)")
+    parser.add_argument("--optimize", action="store_true",
+                        help="rewrite the finished PDFs smaller: duplicate images merged, objects packed "
+                             "into object streams (needs pikepdf)")
+    parser.add_argument("--linearize", action="store_true",
+                        help="--optimize, and linearize the PDFs so the first pages show while the rest "
+                             "is still loading, e.g. from a network share (needs pikepdf)")
+    parser.add_argument("--progress", action="store_true",
+                        help="print progress, throughput and time left to stderr (jobs run one at a time)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record per-stage timings and write them as a Chrome trace (jobs run one at a time)")
+    parser.add_argument("--trace-summary", metavar="FILE",
+                        help="record per-stage timings and write a JSON summary (jobs run one at a time)")
+    return parser
+
+
+def run_job_with_progress(job):
+    """Runs one job on a worker thread and prints its progress from this one."""
+    progress = ProgressChannel()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(run_photolog_job, dict(job, progress=progress))
+        while not future.done():
+            wait([future], timeout=CLI_PROGRESS_INTERVAL)
+            if progress.drain():
+                print(f"  {os.path.basename(job['photo_folder'])}: {progress.summary()}", file=sys.stderr)
+        return future.result()
+
+
+def run_cli(argv):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.sharded and args.max_mb:
+        parser.error("--sharded splits volumes by --max-pages only")
+    try:
+        folders = expand_job_folders(args.folders, args.manifest)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if not folders:
+        print("Error: no photo folders given", file=sys.stderr)
+        return 2
+    if not os.path.exists(args.logo):
+        print(f"Error: Logo file not found: {args.logo}", file=sys.stderr)
+        return 2
+
+    workers = max(1, args.workers)
+    jobs = [
+        {
+            "photo_folder": folder,
+            "output_path": output_path,
+            "logo_path": args.logo,
+            "sort": args.sort,
+            "rename": args.rename,
+            # One job gets the whole pool for its images; several jobs get a process each
+            "workers": workers if len(folders) == 1 else 1,
+            "use_cache": not args.no_cache,
+            "max_pages": args.max_pages,
+            "max_bytes": int(args.max_mb * 1024 * 1024) if args.max_mb else None,
+            "profile": args.profile,
+            "sharded": args.sharded,
+            "fields": args.fields,
+            "optimize": args.optimize,
+            "linearize": args.linearize,
+        }
+        for folder, output_path in zip(folders, job_output_paths(folders, args.output))
+    ]
+
+    failures = 0
+
+    def report(n, job, written=None, error=None):
+        nonlocal failures
+        if error is None:
+            print(f"[{n}/{len(jobs)}] {job['photo_folder']} -> {', '.join(written)}")
+        else:
+            failures += 1
+            print(f"[{n}/{len(jobs)}] {job['photo_folder']} FAILED: {error}", file=sys.stderr)
+
+    tracing = args.trace or args.trace_summary
+    if tracing:
+        start_tracing()
+
+    if len(jobs) == 1 or workers == 1 or args.progress or tracing:
+        run_job = run_job_with_progress if args.progress else run_photolog_job
+        for n, job in enumerate(jobs, 1):
+            try:
+                report(n, job, run_job(job))
+            except Exception as e:
+                report(n, job, error=e)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = {pool.submit(run_photolog_job, job): job for job in jobs}
+            for n, fut in enumerate(concurrent.futures.as_completed(futures), 1):
+                try:
+                    report(n, futures[fut], fut.result())
+                except Exception as e:
+                    report(n, futures[fut], error=e)
+
+    if tracing:
+        tracer = stop_tracing()
+        try:
+            if args.trace:
+                tracer.write_chrome_trace(args.trace)
+            if args.trace_summary:
+                tracer.write_summary(args.trace_summary)
+        except OSError as e:
+            print(f"Error: could not write trace: {e}", file=sys.stderr)
+            return 1
+
+    return 1 if failures else 0
 
 
 # ----------------- JOKES -----------------
+LOCAL_JOKES = (
+    "Why don’t skeletons fight each other? Because they don’t have the guts!",
+    "I only know 25 letters of the alphabet. I don't know y.",
+    "Why did the scarecrow win an award? Because he was outstanding in his field.",
+    "I used to hate facial hair, but then it grew on me.",
+    "What do you call a fake noodle? An impasta.",
+    "Why can't a bicycle stand up by itself? It's two tired.",
+    "I'm reading a book about anti-gravity. It's impossible to put down.",
+    "What do you call a factory that makes okay products? A satisfactory.",
+)
+
+
 def get_dad_joke():
+    """A joke from icanhazdadjoke.com, or one of LOCAL_JOKES when offline or slow."""
     try:
-        response = requests.get("https://icanhazdadjoke.com/", headers={"Accept": "application/json"})
+        import requests
+
+        response = requests.get("https://icanhazdadjoke.com/", headers={"Accept": "application/json"},
+                                timeout=JOKE_TIMEOUT)
         response.raise_for_status()
         return response.json()["joke"]
     except Exception:
-        return "Why don’t skeletons fight each other? Because they don’t have the guts!"
+        return random.choice(LOCAL_JOKES)
+
+
+def fetch_dad_joke():
+    """Starts get_dad_joke() on a daemon thread and returns a Future for its result."""
+    future = concurrent.futures.Future()
+    threading.Thread(target=lambda: future.set_result(get_dad_joke()), name="dad-joke", daemon=True).start()
+    return future
+
+
+def show_joke_when_ready(label, future):
+    """Puts the joke into `label` once the fetch finishes; polls from the Tk thread."""
+    if not label.winfo_exists():
+        return
+    if future.done():
+        label.config(text=future.result())
+    else:
+        label.after(JOKE_POLL_MS, show_joke_when_ready, label, future)
 
 
 # ----------------- PREVIEW WINDOW -----------------
+class GridTile:
+    """
+    Canvas items (thumbnail, label, Remove/Preview buttons) for one grid slot.
+
+    The preview grid only keeps tiles for the rows in view and rebinds them to
+    other photos as the user scrolls, so big jobs don't create thousands of widgets.
+    """
+    def __init__(self, grid):
+        canvas = grid.canvas
+        self.index = None
+        self.path = None
+        self.photo = None  # PhotoImage on display (keeps it alive)
+        self.preview_since = None  # when a small embedded preview went up, until the sharp render replaces it
+
+        self.image_id = canvas.create_image(0, 0, anchor="nw", state="hidden")
+        self.text_id = canvas.create_text(
+            0, 0,
+            anchor="n",
+            font=("Segoe UI", 10),
+            fill=FG,
+            state="hidden"
+        )
+
+        # Frame with Remove + Preview buttons
+        self.frame = tk.Frame(canvas, bg=PANEL_BG)
+        remove_btn = ttk.Button(self.frame, text="Remove", command=lambda: grid.remove_photo(self.path))
+        remove_btn.pack(side=tk.LEFT, padx=(0, 5))
+        preview_btn = ttk.Button(self.frame, text="Preview", command=lambda: grid.show_photo_preview(self.path))
+        preview_btn.pack(side=tk.LEFT)
+        self.window_id = canvas.create_window(0, 0, window=self.frame, anchor="n", state="hidden")
+
+
+class PhotoViewer:
+    """
+    Full-size photo window reused for every Preview click.
+
+    Previous/Next follow the grid's current order. Neighbouring photos are
+    decoded and scaled on background threads with a fast filter so stepping
+    through a job stays quick; once the user stops on a photo for
+    VIEWER_SETTLE_MS it is re-rendered with LANCZOS. Images go through the
+    grid's ImageCache.
+    """
+    def __init__(self, grid):
+        self.grid = grid
+        self.images = grid.images
+        self.path = None
+        self.direction = 1  # last step, so prefetch looks ahead the way the user is going
+        self.photo = None  # PhotoImage on display (keeps it alive)
+        self.futures = {}  # cache key -> Future rendering it
+        self.pool = ThreadPoolExecutor(max_workers=VIEWER_WORKERS, thread_name_prefix="viewer")
+        self.settle_job = None
+        self.poll_job = None
+
+        self.window = tk.Toplevel(grid.window)
+        self.window.configure(bg=BG)
+        sw = self.window.winfo_screenwidth()
+        sh = self.window.winfo_screenheight()
+        self.box = (int(sw * 0.8), int(sh * 0.8))
+
+        self.label = tk.Label(self.window, bg=BG, fg=FG)
+        self.label.pack(padx=10, pady=10)
+
+        nav = tk.Frame(self.window, bg=BG)
+        nav.pack(fill=tk.X, pady=(0, 10))
+        prev_btn = ttk.Button(nav, text="Previous", command=lambda: self.step(-1))
+        prev_btn.pack(side=tk.LEFT, padx=10)
+        next_btn = ttk.Button(nav, text="Next", command=lambda: self.step(1))
+        next_btn.pack(side=tk.RIGHT, padx=10)
+        self.caption = tk.Label(nav, bg=BG, fg=FG, font=("Segoe UI", 10))
+        self.caption.pack()
+
+        self.window.bind("<Left>", lambda e: self.step(-1))
+        self.window.bind("<Right>", lambda e: self.step(1))
+        self.window.bind("<Escape>", lambda e: self.close())
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.poll()
+
+    def key(self, path, fine):
+        # File identity last, like the grid's keys: the ImageCache outlives renames and edits
+        return ("view", path, self.box, "fine" if fine else "fast", self.grid.file_stats.get(path))
+
+    def show(self, path):
+        self.path = path
+        paths = [p[0] for p in self.grid.photos]
+        idx = paths.index(path) if path in paths else None
+        name = os.path.basename(path)
+        self.window.title(name)
+        self.caption.config(text=f"{idx + 1} of {len(paths)}: {name}" if idx is not None else name)
+
+        if self.settle_job:
+            self.window.after_cancel(self.settle_job)
+            self.settle_job = None
+        try:
+            img = self.images.get(self.key(path, True))
+            if img is None:
+                img = self.images.get(self.key(path, False))
+                if img is None:
+                    img = self.render_now(path)
+                self.settle_job = self.window.after(VIEWER_SETTLE_MS, self.upgrade)
+            self.display(img)
+        except Exception as e:
+            self.photo = None
+            self.label.config(image="", text=f"Could not open image:\n{e}")
+
+        self.prefetch(paths, idx)
+        self.window.lift()
+        self.window.focus_set()
+
+    def render_now(self, path):
+        key = self.key(path, False)
+        future = self.futures.pop(key, None)
+        if future is not None and not future.cancel():
+            # Already being prefetched: waiting beats decoding it twice
+            img = future.result()
+        else:
+            img = fit_image(path, self.box, VIEWER_FAST_RESAMPLE)
+        self.images.put(key, img)
+        return img
+
+    def display(self, img):
+        self.photo = ImageTk.PhotoImage(img)
+        self.label.config(image=self.photo, text="")
+
+    def step(self, delta):
+        paths = [p[0] for p in self.grid.photos]
+        if not paths:
+            return
+        idx = paths.index(self.path) if self.path in paths else -1
+        new_idx = max(0, min(len(paths) - 1, idx + delta))
+        if new_idx != idx:
+            self.direction = delta
+            self.show(paths[new_idx])
+
+    def prefetch(self, paths, idx):
+        """Queues fast renders of the neighbours and drops queued work nobody needs any more."""
+        wanted = set()
+        if idx is not None:
+            for offset in (self.direction, -self.direction, 2 * self.direction):
+                if 0 <= idx + offset < len(paths):
+                    path = paths[idx + offset]
+                    if self.key(path, True) not in self.images:
+                        wanted.add(self.key(path, False))
+        wanted.add(self.key(self.path, True))  # the LANCZOS upgrade, if one is queued
+        for key, future in list(self.futures.items()):
+            if key not in wanted and future.cancel():
+                del self.futures[key]
+        for key in wanted:
+            if key[3] == "fast" and key not in self.futures and key not in self.images:
+                self.futures[key] = self.pool.submit(fit_image, key[1], self.box, VIEWER_FAST_RESAMPLE)
+
+    def upgrade(self):
+        self.settle_job = None
+        key = self.key(self.path, True)
+        if key not in self.futures and key not in self.images:
+            self.futures[key] = self.pool.submit(fit_image, self.path, self.box, Image.Resampling.LANCZOS)
+
+    def poll(self):
+        for key, future in list(self.futures.items()):
+            if not future.done():
+                continue
+            del self.futures[key]
+            try:
+                img = future.result()
+            except Exception as e:
+                print(f"Failed to load {key[1]}: {e}")
+                continue
+            self.images.put(key, img)
+            if key[3] == "fine":
+                self.images.discard(self.key(key[1], False))
+                if key[1] == self.path:
+                    self.display(img)
+        self.poll_job = self.window.after(VIEWER_POLL_MS, self.poll)
+
+    def close(self):
+        for job in (self.settle_job, self.poll_job):
+            if job:
+                self.window.after_cancel(job)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.grid.viewer = None
+        self.window.destroy()
+
+
 class PhotoPreviewWindow:
-    def __init__(self, parent, photos, output_path, logo_path, on_generate):
+    def __init__(self, parent, photos, output_path, logo_path, on_generate, cache=None, scanner=None,
+                 index=None, file_stats=None, images=None, removed=None):
         self.parent = parent
         self.photos = photos.copy()
+        # path -> photo taken out of the grid; "Arrange by Name" puts them back
+        self.removed_photos = {p[0]: p for p in removed or ()}
+        # removals from the saved arrangement; only Generate adds to them
+        self.saved_removed = {os.path.basename(path) for path in self.removed_photos}
         self.output_path = output_path
         self.logo_path = logo_path
         self.on_generate = on_generate
@@ -255,7 +2793,7 @@ class PhotoPreviewWindow:
         
         self.scrollbar = tk.Scrollbar(self.window, orient="vertical", command=self.canvas.yview)
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.canvas.config(yscrollcommand=self.scrollbar.set)
+        self.canvas.config(yscrollcommand=self.on_yscroll)
         
         self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)
         
@@ -266,8 +2804,21 @@ class PhotoPreviewWindow:
         self.spacing_x = 80
         self.spacing_y = 140  # spacing to avoid overlap
 
-        self.photo_items = []  # (image_id, text_id, photo, path, button_window_id)
-        self.thumb_cache = {}  # path -> PhotoImage (cache for speed)
+        self.tiles = {}  # photo index -> GridTile currently on screen
+        self.spare_tiles = []  # hidden GridTiles ready for reuse
+        self.images = images or ImageCache()  # decoded thumbnails and viewer images
+        self.failed_thumbs = set()  # paths that couldn't be decoded
+        self.sharpening = set()  # paths whose full-quality thumbnail has been requested
+        self.placeholder = ImageTk.PhotoImage(Image.new("RGB", self.thumb_size, THUMB_PLACEHOLDER))
+        self.thumb_loader = ThumbnailLoader(self.thumb_size, cache)
+        self.thumb_job = None  # pending poll_thumbnails() callback
+        self.viewer = None  # PhotoViewer, created on the first Preview click
+        self.cache = cache  # DerivativeCache shared across runs (optional)
+        self.scanner = scanner  # MetadataScanner still filling in (None, None) timestamps/coords
+        self.index = index  # MetadataIndex remembering metadata + arrangement (optional)
+        self.file_stats = file_stats or {}  # path -> (size, mtime_ns) for every photo in the folder
+        self.photo_folder = os.path.dirname(self.photos[0][0]) if self.photos else None
+        self.index_rows = []  # freshly scanned metadata not yet written to the index
 
         # Drag-and-drop state
         self.dragged_index = None
@@ -275,7 +2826,9 @@ class PhotoPreviewWindow:
         self.last_drag_y = None
         self.drop_indicator = None
 
-        self.load_photos()
+        self.grid_cols = None  # column count the tiles were last placed for
+        self.resize_job = None  # pending debounced reflow
+        self.update_grid()
         
         self.canvas.bind("<Configure>", self.on_canvas_resize)
         self.canvas.bind("<Button-1>", self.on_press)
@@ -307,8 +2860,105 @@ class PhotoPreviewWindow:
         )
         self.generate_button.pack(side=tk.RIGHT, padx=10, pady=10)
 
+        # Off: files keep their names and "Photo N" only appears in the PDF
+        self.rename_files = tk.BooleanVar(self.window, value=True)
+        self.rename_check = ttk.Checkbutton(
+            self.button_frame,
+            text="Rename files to \"Photo N\"",
+            variable=self.rename_files
+        )
+        self.rename_check.pack(side=tk.RIGHT, padx=10, pady=10)
+
         self.update_sort_button_styles("name")
 
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.poll_metadata()
+        self.poll_thumbnails()
+
+    # ---- BACKGROUND METADATA ----
+    def apply_metadata(self, wait=False):
+        """
+        Copies finished scanner results into self.photos. With wait=True, blocks
+        for the photos still missing. Returns True once every photo has metadata.
+        """
+        if self.scanner is None:
+            return True
+        complete = True
+        for idx, photo in enumerate(self.photos):
+            photo = self.apply_scan_result(photo, wait)
+            self.photos[idx] = photo
+            complete = complete and photo[1] is not None
+        # Removed photos were scanned too, so restoring them never needs another scan
+        for path, photo in self.removed_photos.items():
+            photo = self.apply_scan_result(photo, wait)
+            self.removed_photos[path] = photo
+            complete = complete and photo[1] is not None
+        return complete
+
+    def apply_scan_result(self, photo, wait):
+        """The photo with the scanner's timestamp/coords filled in, if they're ready (or wait=True)."""
+        path, timestamp, coords = photo
+        if timestamp is not None or not (wait or self.scanner.done(path)):
+            return photo
+        timestamp, coords = self.scanner.result(path)
+        if path in self.file_stats:
+            size, mtime_ns = self.file_stats[path]
+            self.index_rows.append((os.path.basename(path), size, mtime_ns, timestamp, coords))
+        return (path, timestamp, coords)
+
+    def poll_metadata(self):
+        if self.apply_metadata():
+            self.scanner = None
+        else:
+            self.window.after(METADATA_POLL_MS, self.poll_metadata)
+
+    def wait_for_metadata(self):
+        if self.scanner is None:
+            return
+        self.window.config(cursor="watch")
+        self.window.update_idletasks()
+        try:
+            self.apply_metadata(wait=True)
+        finally:
+            self.window.config(cursor="")
+
+    def save_to_index(self, keep_removals=False):
+        """
+        Writes scanned metadata and the current order to the index. Removals are
+        only saved as they stand with keep_removals=True (Generate); closing the
+        window can bring saved removals back but never adds new ones.
+        """
+        if self.index is None or self.photo_folder is None:
+            return
+        names = [os.path.basename(p[0]) for p in self.photos]
+        removed = {os.path.basename(path) for path in self.removed_photos}
+        if not keep_removals:
+            removed &= self.saved_removed
+        self.saved_removed = removed
+        try:
+            self.index.store(self.photo_folder, self.index_rows)
+            self.index.save_arrangement(self.photo_folder, names, removed)
+        except sqlite3.Error as e:
+            print(f"Metadata index update failed: {e}")
+        self.index_rows = []
+
+    def close(self):
+        if self.viewer is not None:
+            self.viewer.close()
+        self.thumb_loader.shutdown()
+        if self.thumb_job:
+            self.window.after_cancel(self.thumb_job)
+            self.thumb_job = None
+        if self.resize_job:
+            self.window.after_cancel(self.resize_job)
+            self.resize_job = None
+        if self.scanner is not None:
+            self.scanner.shutdown()
+            self.scanner = None
+        self.save_to_index()
+        print(f"Image cache: {self.images.summary()}")
+        self.window.destroy()
+
     # ---- SORT BUTTON STYLE TOGGLING ----
     def update_sort_button_styles(self, mode):
         if mode == "name":
@@ -326,134 +2976,199 @@ class PhotoPreviewWindow:
         per_tile_height = self.thumb_size[1] + self.spacing_y
         return canvas_width, per_tile_width, per_tile_height, cols
 
-    def load_photos(self):
-        self.canvas.delete("all")
-        self.photo_items.clear()
-
+    def tile_origin(self, idx):
         _, per_tile_width, per_tile_height, cols = self.get_grid_params()
-
-        for idx, (path, _, _) in enumerate(self.photos):
-            row = idx // cols
-            col = idx % cols
-            x = self.margin_x + col * per_tile_width
-            y = self.margin_y + row * per_tile_height
-
-            # Use cached thumbnail if available
-            if path in self.thumb_cache:
-                photo = self.thumb_cache[path]
-            else:
-                try:
-                    img = open_image_for_pillow(path)
-                    img.thumbnail(self.thumb_size, Image.Resampling.LANCZOS)
-                    photo = ImageTk.PhotoImage(img)
-                    self.thumb_cache[path] = photo
-                except Exception as e:
-                    print(f"Failed to load {path}: {e}")
-                    continue
-
-            image_id = self.canvas.create_image(x, y, image=photo, anchor="nw")
-            text = f"{idx + 1}. {os.path.basename(path)}"
-            text_id = self.canvas.create_text(
-                x + self.thumb_size[0] / 2,
-                y + self.thumb_size[1] + 20,
-                text=text,
-                anchor="n",
-                font=("Segoe UI", 10),
-                fill=FG
-            )
-
-            # Frame with Remove + Preview buttons
-            btn_frame = tk.Frame(self.canvas, bg=PANEL_BG)
-            remove_btn = ttk.Button(btn_frame, text="Remove", command=lambda p=path: self.remove_photo(p))
-            remove_btn.pack(side=tk.LEFT, padx=(0, 5))
-            preview_btn = ttk.Button(btn_frame, text="Preview", command=lambda p=path: self.show_photo_preview(p))
-            preview_btn.pack(side=tk.LEFT)
-
-            button_window_id = self.canvas.create_window(
-                x + self.thumb_size[0] / 2,
-                y + self.thumb_size[1] + 50,
-                window=btn_frame,
-                anchor="n"
-            )
-
-            self.photo_items.append((image_id, text_id, photo, path, button_window_id))
-
-        if self.photo_items:
-            bbox = self.canvas.bbox("all")
-            self.canvas.config(scrollregion=bbox)
-        else:
-            canvas_width = self.canvas.winfo_width() or 800
-            self.canvas.config(scrollregion=(0, 0, canvas_width, 0))
+        row = idx // cols
+        col = idx % cols
+        return self.margin_x + col * per_tile_width, self.margin_y + row * per_tile_height
+
+    def visible_indices(self, overscan=GRID_OVERSCAN_ROWS):
+        """Photo indices in the rows on screen, plus `overscan` rows above and below."""
+        _, _, per_tile_height, cols = self.get_grid_params()
+        top = self.canvas.canvasy(0)
+        bottom = self.canvas.canvasy(self.canvas.winfo_height())
+        first_row = max(0, int((top - self.margin_y) // per_tile_height) - overscan)
+        last_row = int((bottom - self.margin_y) // per_tile_height) + overscan
+        return range(first_row * cols, min(len(self.photos), (last_row + 1) * cols))
+
+    # ---- BACKGROUND THUMBNAILS ----
+    def request_thumbnails(self):
+        """
+        Queues quick thumbnails for the bound tiles still showing a placeholder,
+        on-screen rows first, then sharp renders for the previews that are due.
+        """
+        on_screen = self.visible_indices(overscan=0)
+        missing = [idx for idx, tile in self.tiles.items()
+                   if tile.photo is None and tile.path not in self.failed_thumbs]
+        missing.sort(key=lambda idx: (idx not in on_screen, idx))
+        self.sharpening = self.previews_due(on_screen)
+        self.thumb_loader.request([self.tiles[idx].path for idx in missing], self.sharpening)
+
+    def previews_due(self, on_screen):
+        """Paths of on-screen tiles that have shown an embedded preview for THUMBNAIL_SHARPEN_MS."""
+        now = time.monotonic()
+        return {tile.path for idx, tile in self.tiles.items()
+                if idx in on_screen and tile.preview_since is not None
+                and (now - tile.preview_since) * 1000 >= THUMBNAIL_SHARPEN_MS}
+
+    def image_key(self, kind, path):
+        """ImageCache key for the grid's `kind` ("thumb" / "preview") image of the file now at path."""
+        return (kind, path, self.file_stats.get(path))
+
+    def poll_thumbnails(self):
+        for path, img, sharp in self.thumb_loader.results():
+            if img is None:
+                self.failed_thumbs.add(path)
+            elif sharp:
+                self.images.discard(self.image_key("preview", path))
+                self.images.put(self.image_key("thumb", path), img)
+            elif self.image_key("thumb", path) not in self.images:
+                self.images.put(self.image_key("preview", path), img)
+            for tile in self.tiles.values():
+                if tile.path == path:
+                    self.show_thumbnail(tile)
+        if self.previews_due(self.visible_indices(overscan=0)) != self.sharpening:
+            self.request_thumbnails()
+        self.thumb_job = self.window.after(THUMBNAIL_POLL_MS, self.poll_thumbnails)
+
+    def show_thumbnail(self, tile):
+        # Tk images only exist for bound tiles; the cache holds the compact Pillow copies
+        img = self.images.get(self.image_key("thumb", tile.path))
+        preview = False
+        if img is None:
+            img = self.images.get(self.image_key("preview", tile.path))
+            preview = img is not None and tile.path not in self.failed_thumbs
+        tile.photo = ImageTk.PhotoImage(img) if img is not None else None
+        if not preview:
+            tile.preview_since = None
+        elif tile.preview_since is None:
+            tile.preview_since = time.monotonic()
+        failed = img is None and tile.path in self.failed_thumbs
+        self.canvas.itemconfig(tile.image_id, image=tile.photo or self.placeholder,
+                               state="hidden" if failed else "normal")
+
+    def update_grid(self):
+        """
+        Brings the grid in line with self.photos.
+
+        Tiles still in view are re-keyed to their photo's new index and only moved
+        if their slot changed; everything else is recycled or bound on demand.
+        """
+        _, _, per_tile_height, cols = self.get_grid_params()
+        reflow = cols != self.grid_cols
+        self.grid_cols = cols
+
+        rows = math.ceil(len(self.photos) / cols)
+        canvas_width = self.canvas.winfo_width() or 800
+        # Scroll region from the photo count; most tiles don't exist as canvas items
+        height = self.margin_y + rows * per_tile_height if rows else 0
+        self.canvas.config(scrollregion=(0, 0, canvas_width, height))
+
+        slots = {photo[0]: idx for idx, photo in enumerate(self.photos)}
+        wanted = self.visible_indices()
+        old_tiles, self.tiles = self.tiles, {}
+        for tile in old_tiles.values():
+            idx = slots.get(tile.path)
+            if idx is None or idx not in wanted:
+                self.recycle_tile(tile)
+                continue
+            self.tiles[idx] = tile
+            if reflow or idx != tile.index:
+                self.place_tile(tile, idx)
+        for idx in wanted:
+            if idx not in self.tiles:
+                self.bind_tile(idx)
+        self.request_thumbnails()
+
+    def render_visible(self):
+        """Binds pooled tiles to the photos in view and recycles the ones that scrolled away."""
+        wanted = self.visible_indices()
+        for idx in list(self.tiles):
+            if idx not in wanted and idx != self.dragged_index:
+                self.recycle_tile(self.tiles.pop(idx))
+        for idx in wanted:
+            if idx not in self.tiles:
+                self.bind_tile(idx)
+        self.request_thumbnails()
+
+    def bind_tile(self, idx):
+        tile = self.spare_tiles.pop() if self.spare_tiles else GridTile(self)
+        tile.path = self.photos[idx][0]
+        self.show_thumbnail(tile)
+        self.canvas.itemconfig(tile.text_id, state="normal")
+        self.canvas.itemconfig(tile.window_id, state="normal")
+        self.place_tile(tile, idx)
+        self.tiles[idx] = tile
+
+    def place_tile(self, tile, idx):
+        x, y = self.tile_origin(idx)
+        self.canvas.coords(tile.image_id, x, y)
+        self.canvas.coords(tile.text_id, x + self.thumb_size[0] / 2, y + self.thumb_size[1] + 20)
+        self.canvas.coords(tile.window_id, x + self.thumb_size[0] / 2, y + self.thumb_size[1] + 50)
+        if idx != tile.index:
+            self.canvas.itemconfig(tile.text_id, text=f"{idx + 1}. {os.path.basename(tile.path)}")
+        tile.index = idx
+
+    def recycle_tile(self, tile):
+        for item in (tile.image_id, tile.text_id, tile.window_id):
+            self.canvas.itemconfig(item, state="hidden")
+        self.canvas.itemconfig(tile.image_id, image="")
+        tile.index = tile.path = tile.photo = tile.preview_since = None
+        self.spare_tiles.append(tile)
+
+    def on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.render_visible()
 
     def remove_photo(self, path):
+        self.removed_photos.update((p[0], p) for p in self.photos if p[0] == path)
         self.photos = [p for p in self.photos if p[0] != path]
-        self.load_photos()
+        self.update_grid()
 
     def sort_by_name(self):
+        # The default arrangement: every photo in the folder, removed ones included
+        self.photos.extend(self.removed_photos.values())
+        self.removed_photos.clear()
         self.photos.sort(key=lambda x: os.path.basename(x[0]).lower())
         self.update_sort_button_styles("name")
-        self.load_photos()
+        self.update_grid()
 
     def sort_by_timestamp(self):
+        self.wait_for_metadata()
         self.photos.sort(key=lambda x: x[1])
         self.update_sort_button_styles("time")
-        self.load_photos()
+        self.update_grid()
 
     # ---- FULL-PHOTO PREVIEW ----
     def show_photo_preview(self, path):
-        win = tk.Toplevel(self.window)
-        win.title(os.path.basename(path))
-        win.configure(bg=BG)
-
-        sw = win.winfo_screenwidth()
-        sh = win.winfo_screenheight()
-        max_w = int(sw * 0.8)
-        max_h = int(sh * 0.8)
-
-        try:
-            img = open_image_for_pillow(path)
-            img_ratio = img.width / img.height
-            max_ratio = max_w / max_h
-
-            if img.width > max_w or img.height > max_h:
-                if img_ratio > max_ratio:
-                    new_w = max_w
-                    new_h = int(max_w / img_ratio)
-                else:
-                    new_h = max_h
-                    new_w = int(max_h * img_ratio)
-                img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-
-            photo = ImageTk.PhotoImage(img)
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not open image:\n{e}")
-            win.destroy()
-            return
-
-        lbl = tk.Label(win, image=photo, bg=BG)
-        lbl.pack(padx=10, pady=10)
-        win.image = photo  # keep reference
+        if self.viewer is None:
+            self.viewer = PhotoViewer(self)
+        self.viewer.show(path)
 
     # ---- SCROLLING ----
     def on_mouse_wheel(self, event):
         self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
 
     def on_canvas_resize(self, event):
-        # Reflow the grid when the window is resized
-        self.load_photos()
-        if self.canvas.bbox("all"):
-            self.canvas.config(scrollregion=self.canvas.bbox("all"))
+        # <Configure> fires continuously while dragging the window edge; reflow once it settles
+        if self.resize_job:
+            self.window.after_cancel(self.resize_job)
+        self.resize_job = self.window.after(GRID_RESIZE_DEBOUNCE_MS, self.reflow_grid)
+
+    def reflow_grid(self):
+        self.resize_job = None
+        self.update_grid()
 
     # ---- DRAG & DROP ----
     def find_photo_at(self, x, y):
-        for idx, (image_id, text_id, photo, path, button_id) in enumerate(self.photo_items):
-            ix, iy = self.canvas.coords(image_id)
-            x1, y1 = ix, iy
-            x2 = x1 + self.thumb_size[0]
-            y2 = y1 + self.thumb_size[1]
-            if x1 <= x <= x2 and y1 <= y <= y2:
-                return idx
-        return None
+        """Index of the thumbnail under canvas point (x, y), worked out from the grid layout."""
+        _, per_tile_width, per_tile_height, cols = self.get_grid_params()
+        col, dx = divmod(x - self.margin_x, per_tile_width)
+        row, dy = divmod(y - self.margin_y, per_tile_height)
+        if col < 0 or col >= cols or row < 0 or dx > self.thumb_size[0] or dy > self.thumb_size[1]:
+            return None
+        idx = int(row) * cols + int(col)
+        return idx if idx < len(self.photos) else None
 
     def on_press(self, event):
         cx = self.canvas.canvasx(event.x)
@@ -478,14 +3193,14 @@ class PhotoPreviewWindow:
         self.last_drag_x = cx
         self.last_drag_y = cy
 
-        image_id, text_id, photo, path, button_id = self.photo_items[self.dragged_index]
-        self.canvas.move(image_id, dx, dy)
-        self.canvas.move(text_id, dx, dy)
-        self.canvas.move(button_id, dx, dy)
+        tile = self.tiles[self.dragged_index]
+        self.canvas.move(tile.image_id, dx, dy)
+        self.canvas.move(tile.text_id, dx, dy)
+        self.canvas.move(tile.window_id, dx, dy)
 
         # Compute where we are in the grid
         canvas_width, per_tile_width, per_tile_height, cols = self.get_grid_params()
-        ix, iy = self.canvas.coords(image_id)
+        ix, iy = self.canvas.coords(tile.image_id)
         center_x = ix + self.thumb_size[0] / 2
         center_y = iy + self.thumb_size[1] / 2
 
@@ -509,11 +3224,12 @@ class PhotoPreviewWindow:
         line_y2 = ty + self.thumb_size[1]
 
         if self.drop_indicator:
-            self.canvas.delete(self.drop_indicator)
-        self.drop_indicator = self.canvas.create_line(
-            line_x, line_y1, line_x, line_y2,
-            fill="red", width=3, dash=(4, 4)
-        )
+            self.canvas.coords(self.drop_indicator, line_x, line_y1, line_x, line_y2)
+        else:
+            self.drop_indicator = self.canvas.create_line(
+                line_x, line_y1, line_x, line_y2,
+                fill="red", width=3, dash=(4, 4)
+            )
 
     def on_release(self, event):
         if self.dragged_index is None:
@@ -531,6 +3247,9 @@ class PhotoPreviewWindow:
         if new_index != self.dragged_index:
             item = self.photos.pop(self.dragged_index)
             self.photos.insert(new_index, item)
+        else:
+            # Dropped back on its own slot: snap it into place
+            self.place_tile(self.tiles[new_index], new_index)
 
         self.dragged_index = None
         self.last_drag_x = None
@@ -539,43 +3258,48 @@ class PhotoPreviewWindow:
             self.canvas.delete(self.drop_indicator)
             self.drop_indicator = None
 
-        self.load_photos()
+        # Only the tiles between the old and new slot actually move
+        self.update_grid()
 
     # ---- RENAME & GENERATE ----
     def rename_photos(self):
         if not self.photos:
             return
-        photo_folder = os.path.dirname(self.photos[0][0])
-        temp_photos = []
-        
-        for idx, (path, ts, coords) in enumerate(self.photos):
-            ext = os.path.splitext(path)[1]
-            temp_path = os.path.join(photo_folder, f"temp_{idx}{ext}")
-            shutil.move(path, temp_path)
-            temp_photos.append((temp_path, ts, coords))
-        
-        new_photos = []
-        for idx, (temp_path, ts, coords) in enumerate(temp_photos):
-            ext = os.path.splitext(temp_path)[1]
-            new_path = os.path.join(photo_folder, f"Photo {idx + 1}{ext}")
-            shutil.move(temp_path, new_path)
-            new_photos.append((new_path, ts, coords))
-        
+        new_photos = rename_to_photo_numbers(self.photos, self.index)
+        moved_stats = {new[0]: self.file_stats.pop(old[0])
+                       for old, new in zip(self.photos, new_photos) if old[0] in self.file_stats}
+        self.file_stats.update(moved_stats)
         self.photos = new_photos
 
     def generate_pdf(self):
-        self.rename_photos()
-        self.window.destroy()
+        # GPS coords go into the PDF, so every photo needs its metadata first
+        self.wait_for_metadata()
+        self.save_to_index(keep_removals=True)
+        if self.rename_files.get():
+            try:
+                self.rename_photos()
+            except OSError as e:
+                messagebox.showerror(
+                    "Rename Failed",
+                    f"{e}\n\nNo files were renamed. Untick \"Rename files\" to keep the current names.",
+                    parent=self.window
+                )
+                return
+        self.close()
         self.on_generate(self.photos, self.output_path, self.logo_path)
 
 
 # ----------------- MAIN APP -----------------
 class PhotologApp:
     def __init__(self, root):
+        load_tk()  # already done when started as a script; callers may build their own root
         self.root = root
         self.root.title("Photolog Generator")
-        self.root.geometry("520x480")
+        self.root.geometry("520x590")
         self.root.configure(bg=BG)
+        self.cache = open_derivative_cache()
+        self.index = open_metadata_index()
+        self.images = ImageCache()
 
         # ttk style
         style = ttk.Style()
@@ -586,6 +3310,7 @@ class PhotologApp:
         style.configure("TLabel", background=BG, foreground=FG, font=("Segoe UI", 10))
         style.configure("TEntry", fieldbackground=PANEL_BG, foreground=FG)
         style.configure("TButton", font=("Segoe UI", 10), padding=6)
+        style.configure("TCheckbutton", background=BG, foreground=FG, font=("Segoe UI", 10))
         style.configure("Accent.TButton", font=("Segoe UI", 10, "bold"), padding=6)
         style.map(
             "Accent.TButton",
@@ -623,13 +3348,37 @@ class PhotologApp:
         self.logo_button = ttk.Button(container, text="Browse", command=self.browse_logo_file)
         self.logo_button.grid(row=5, column=1, padx=(8, 0))
 
+        self.profile_label = ttk.Label(container, text="Output Quality:")
+        self.profile_label.grid(row=6, column=0, sticky="w", pady=(12, 4))
+        self.profile = tk.StringVar(value=DEFAULT_PROFILE)
+        self.profile_combo = ttk.Combobox(
+            container,
+            textvariable=self.profile,
+            values=list(OUTPUT_PROFILES),
+            state="readonly",
+            width=12
+        )
+        self.profile_combo.grid(row=7, column=0, sticky="w")
+
+        self.fields_label = ttk.Label(container, text="Note Fields:")
+        self.fields_label.grid(row=8, column=0, sticky="w", pady=(12, 4))
+        self.fields = tk.StringVar(value=DEFAULT_FIELDS)
+        self.fields_combo = ttk.Combobox(
+            container,
+            textvariable=self.fields,
+            values=list(FIELD_STRATEGIES),
+            state="readonly",
+            width=12
+        )
+        self.fields_combo.grid(row=9, column=0, sticky="w")
+
         container.columnconfigure(0, weight=1)
 
         self.progress = tk.DoubleVar()
         self.progress_bar = ttk.Progressbar(container, variable=self.progress, maximum=100, mode="determinate")
-        self.progress_bar.grid(row=6, column=0, columnspan=2, sticky="we", pady=(18, 4))
+        self.progress_bar.grid(row=10, column=0, columnspan=2, sticky="we", pady=(18, 4))
         self.progress_label = ttk.Label(container, text="Progress: 0%")
-        self.progress_label.grid(row=7, column=0, columnspan=2, sticky="w")
+        self.progress_label.grid(row=11, column=0, columnspan=2, sticky="w")
 
         self.preview_button = ttk.Button(
             container,
@@ -637,16 +3386,18 @@ class PhotologApp:
             style="Accent.TButton",
             command=self.preview_photos
         )
-        self.preview_button.grid(row=8, column=0, columnspan=2, pady=(16, 10))
+        self.preview_button.grid(row=12, column=0, columnspan=2, pady=(16, 10))
 
         self.joke_label = ttk.Label(
             container,
-            text=get_dad_joke(),
+            text="",
             wraplength=420,
             anchor="center",
             justify="center"
         )
-        self.joke_label.grid(row=9, column=0, columnspan=2, pady=(10, 0))
+        self.joke_label.grid(row=13, column=0, columnspan=2, pady=(10, 0))
+        # Fetched in the background once the window is drawn, so an offline laptop doesn't hold it up
+        self.root.after_idle(lambda: show_joke_when_ready(self.joke_label, fetch_dad_joke()))
 
     def browse_photo_folder(self):
         folder = filedialog.askdirectory()
@@ -666,10 +3417,25 @@ class PhotologApp:
             self.logo_entry.delete(0, tk.END)
             self.logo_entry.insert(0, file)
 
-    def update_progress(self, percentage):
-        self.progress.set(percentage)
-        self.progress_label.config(text=f"Progress: {int(percentage)}%")
-        self.root.update_idletasks()
+    def poll_progress(self, channel, outcome):
+        """
+        Redraws the progress bar from the generator's events, PROGRESS_FRAME_MS
+        apart, until the generating thread puts its outcome (None, or the
+        exception it failed with) on `outcome`; then reports how the run ended.
+        """
+        channel.drain()
+        self.progress.set(channel.percent())
+        self.progress_label.config(text=f"Progress: {channel.summary()}")
+        try:
+            error = outcome.get_nowait()
+        except queue.Empty:
+            self.root.after(PROGRESS_FRAME_MS, self.poll_progress, channel, outcome)
+            return
+        self.preview_button.config(state="normal")
+        if error is None:
+            self.show_success()
+        else:
+            messagebox.showerror("Error", f"An error occurred: {str(error)}")
 
     def preview_photos(self):
         photo_folder = self.photo_entry.get()
@@ -684,39 +3450,85 @@ class PhotologApp:
             messagebox.showerror("Error", f"Photo folder not found: {photo_folder}")
             return
 
-        photos = []
-        for filename in os.listdir(photo_folder):
-            if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.heic', '.heif')):
-                path = os.path.join(photo_folder, filename)
-                try:
-                    timestamp, coords = get_photo_metadata(path)
-                except Exception as e:
-                    print(f"Metadata read failed for {path}: {e}")
-                    timestamp = datetime.fromtimestamp(os.path.getmtime(path))
-                    coords = None
-                photos.append((path, timestamp, coords))
+        if os.path.exists(os.path.join(photo_folder, RENAME_JOURNAL)):
+            finish = messagebox.askyesno(
+                "Unfinished Rename",
+                "Renaming the photos in this folder was interrupted.\n\n"
+                "Finish renaming them to \"Photo N\"? Choose No to put their original names back."
+            )
+            try:
+                resume_photo_rename(photo_folder, undo=not finish)
+            except OSError as e:
+                messagebox.showerror("Error", f"Couldn't resume the rename: {e}")
+                return
+
+        # scandir hands back stat data with the listing, so unchanged files never get reopened
+        entries = list_photos(photo_folder)
 
-        if not photos:
+        if not entries:
             messagebox.showerror("Error", "No supported images found in the selected folder.")
             return
 
+        known = self.index.lookup(photo_folder) if self.index else {}
+        file_stats = {}
+        photos = []
+        for entry in entries:
+            st = entry.stat()
+            file_stats[entry.path] = (st.st_size, st.st_mtime_ns)
+            cached = known.get(entry.name)
+            if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+                photos.append((entry.path, cached[2], cached[3]))
+            else:
+                photos.append((entry.path, None, None))
+
         photos.sort(key=lambda x: os.path.basename(x[0]).lower())
 
-        PhotoPreviewWindow(self.root, photos, output_path, logo_path, self.start_generate_photolog)
+        hidden = []
+        if self.index:
+            self.index.prune(photo_folder, [entry.name for entry in entries])
+            order, removed = self.index.load_arrangement(photo_folder)
+            kept = [p for p in photos if os.path.basename(p[0]) not in removed]
+            if kept:  # if everything was removed last time, start over with all of them
+                hidden = [p for p in photos if os.path.basename(p[0]) in removed]
+                photos = kept
+            if order:
+                # Last saved order first; anything new goes after it in name order
+                rank = {name: i for i, name in enumerate(order)}
+                photos.sort(key=lambda x: rank.get(os.path.basename(x[0]), len(rank)))
+
+        # Open the window right away; only new or changed files get their EXIF read,
+        # and their timestamps/GPS fill in as the background scan finishes
+        to_scan = [path for path, timestamp, _ in photos + hidden if timestamp is None]
+        scanner = MetadataScanner(to_scan) if to_scan else None
+
+        PhotoPreviewWindow(self.root, photos, output_path, logo_path, self.start_generate_photolog,
+                           cache=self.cache, scanner=scanner, index=self.index, file_stats=file_stats,
+                           images=self.images, removed=hidden)
 
     def start_generate_photolog(self, photos, output_path, logo_path):
         self.preview_button.config(state="disabled")
         self.progress.set(0)
-        threading.Thread(target=self.generate_photolog, args=(photos, output_path, logo_path), daemon=True).start()
-
-    def generate_photolog(self, photos, output_path, logo_path):
+        channel = ProgressChannel(total=len(photos))
+        outcome = queue.SimpleQueue()
+        profile = self.profile.get()
+        fields = self.fields.get()
+        threading.Thread(target=self.generate_photolog,
+                         args=(photos, output_path, logo_path, channel, outcome, profile, fields),
+                         daemon=True).start()
+        self.poll_progress(channel, outcome)
+
+    def generate_photolog(self, photos, output_path, logo_path, channel, outcome, profile=DEFAULT_PROFILE,
+                          fields=DEFAULT_FIELDS):
+        # Runs on a worker thread: progress goes through the channel and the result
+        # through `outcome`, both read by poll_progress on the Tk thread; never touch Tk here
         try:
-            create_photolog(photos, output_path, logo_path, self.update_progress)
-            self.root.after(0, self.show_success)
+            create_photolog(photos, output_path, logo_path, channel,
+                            workers=DEFAULT_WORKERS, cache=self.cache, profile=profile, fields=fields)
         except Exception as e:
-            self.root.after(0, lambda err=e: messagebox.showerror("Error", f"An error occurred: {str(err)}"))
-        finally:
-            self.root.after(0, lambda: self.preview_button.config(state="normal"))
+            channel.post("failed")
+            outcome.put(e)
+        else:
+            outcome.put(None)
 
     def show_success(self):
         top = tk.Toplevel(self.root)
@@ -727,15 +3539,18 @@ class PhotologApp:
         label = ttk.Label(top, text="Photolog created successfully!")
         label.pack(pady=10)
         
-        joke = get_dad_joke()
-        joke_label = ttk.Label(top, text=joke, wraplength=380, justify="center")
+        joke_label = ttk.Label(top, text="", wraplength=380, justify="center")
         joke_label.pack(pady=10)
+        show_joke_when_ready(joke_label, fetch_dad_joke())
         
         close_button = ttk.Button(top, text="Close", command=top.destroy)
         close_button.pack(pady=10)
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    load_tk()
     root = tk.Tk()
     app = PhotologApp(root)
     root.mainloop()